@@ -0,0 +1,73 @@
+"""Import-time benchmark for the transcription modules.
+
+Each import runs in a fresh interpreter, several times, and the fastest run is
+reported together with the heavy third-party modules it pulled in:
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py components.core.fft "from components.core import FFT"
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["numpy", "scipy.io.wavfile", "scipy.signal", "customtkinter", "CTkMessagebox", "pyaudio",
+                 "matplotlib"]
+
+DEFAULT_IMPORTS = [
+    "import numpy",
+    "from components.core import FFT",
+    "import components.core.fft",
+    "from components.core.fft import FFT; FFT()",
+    "import components.recorder",
+    "import components.live",
+    "import scipy.signal",
+]
+
+MEASURE = """
+import json, sys, time
+started = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"elapsed": elapsed, "loaded": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def time_import(statement, repeat):
+    """Fastest of repeat fresh-interpreter runs of statement, and the heavy modules it loaded."""
+    best = None
+    for _ in range(repeat):
+        completed = subprocess.run([sys.executable, "-c", MEASURE.format(statement=statement, heavy=HEAVY_MODULES)],
+                                   cwd=ROOT, capture_output=True, text=True)
+        if completed.returncode != 0:
+            error = completed.stderr.strip().splitlines()
+            return {"statement": statement, "error": error[-1] if error else "failed"}
+        result = json.loads(completed.stdout)
+        if best is None or result["elapsed"] < best["elapsed"]:
+            best = result
+    best["statement"] = statement
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the import time of the transcription modules.")
+    parser.add_argument("imports", nargs="*",
+                        help="module names or Python statements to time (default: the core and GUI-side modules)")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per import; the fastest is reported")
+    args = parser.parse_args(argv)
+
+    statements = [item if " " in item else f"import {item}" for item in args.imports] or DEFAULT_IMPORTS
+    for statement in statements:
+        result = time_import(statement, args.repeat)
+        if "error" in result:
+            print(f"{statement:45s} failed: {result['error']}")
+            continue
+        print(f"{statement:45s} {result['elapsed'] * 1000:8.1f} ms  loads: {', '.join(result['loaded']) or '-'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""Speed benchmark for FFT analysis and LilyPond conversion on the bundled samples.
+
+Every case runs in a fresh process so that its peak RSS is its own. Results
+can be saved as a baseline and compared against on later runs:
+
+    python benchmarks/bench_transcribe.py --lengthen 1 8 --save benchmarks/baseline.json
+    python benchmarks/bench_transcribe.py --lengthen 1 8 --compare benchmarks/baseline.json
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from components.core.fft import FFT
+from components.core.lilypond_convert import LILYPOND_PATH, LilyPondConverter, lilypond_executable
+from components.core.tracing import Tracer
+
+
+def lilypond_available():
+    return shutil.which(lilypond_executable()) is not None
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(file_path, lengthen, microphone, render, repeat, decimate=False, dtype="float64"):
+    """Transcribe one sample, tiled lengthen times, and return its measurements."""
+    tracer = Tracer()
+    fft = FFT(tracer=tracer, decimate=decimate, dtype=dtype)
+    fs, data = fft.load_audio(file_path, normalize=microphone)
+    if lengthen > 1:
+        data = np.tile(data, (lengthen,) + (1,) * (data.ndim - 1))
+    audio_seconds = len(data) / fs
+
+    best = None
+    for _ in range(repeat):
+        tracer.reset()
+        started = time.perf_counter()
+        notes = fft.analyse(fs, data)
+        with tempfile.TemporaryDirectory() as output_dir:
+            converter = LilyPondConverter(notes, tracer=tracer)
+            lilypond_file_name = os.path.join(output_dir, "bench.ly")
+            converter.write_to_file(lilypond_file_name)
+            if render:
+                converter.run_lilypond(lilypond_file_name)
+        elapsed = time.perf_counter() - started
+        if best is None or elapsed < best["elapsed"]:
+            best = {"elapsed": elapsed, "stages": dict(tracer.timings), "counters": dict(tracer.counters)}
+
+    frames = best["counters"].get("frames", 0)
+    return {"case": f"{os.path.basename(file_path)}x{lengthen}",
+            "audio_seconds": audio_seconds,
+            "elapsed": best["elapsed"],
+            "real_time_factor": best["elapsed"] / audio_seconds,
+            "frames_per_second": frames / best["elapsed"],
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": best["stages"],
+            "notes": best["counters"].get("notes", 0)}
+
+
+def compare(results, baseline, tolerance):
+    """Print each case's change against the baseline; return the cases that got slower."""
+    previous = {case["case"]: case for case in baseline["results"]}
+    regressions = []
+    for case in results:
+        old = previous.get(case["case"])
+        if old is None:
+            continue
+        change = case["real_time_factor"] / old["real_time_factor"] - 1
+        marker = ""
+        if change > tolerance:
+            marker = "  <-- REGRESSION"
+            regressions.append(case["case"])
+        print(f"{case['case']:40s} {old['real_time_factor']:.4f} -> {case['real_time_factor']:.4f} "
+              f"({change:+.1%}){marker}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark FFT analysis and LilyPond conversion.")
+    parser.add_argument("files", nargs="*", help="WAV files to benchmark (default: the bundled samples)")
+    parser.add_argument("--lengthen", type=int, nargs="+", default=[1, 8],
+                        help="also run each sample tiled this many times (default: 1 8)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the fastest one is reported")
+    parser.add_argument("--microphone", action="store_true", help="use the microphone normalisation path")
+    parser.add_argument("--decimate", action="store_true", help="analyse at the reduced sample rate")
+    parser.add_argument("--dtype", choices=["float64", "float32"], default="float64",
+                        help="compute dtype of the DSP (default: float64)")
+    parser.add_argument("--render", action="store_true", help="include LilyPond rendering if LilyPond is installed")
+    parser.add_argument("--save", metavar="FILE", help="save the results as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="slow-down of the real-time factor counted as a regression (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    files = args.files or sorted(glob.glob(os.path.join(ROOT, "samples", "*.wav")))
+    render = args.render and lilypond_available()
+    if args.render and not render:
+        print(f"LilyPond not found at {LILYPOND_PATH} or on PATH; skipping the render stage")
+
+    results = []
+    for file_path in files:
+        for lengthen in args.lengthen:
+            # A fresh process per case keeps peak RSS from carrying over between cases
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                case = executor.submit(run_case, file_path, lengthen, args.microphone, render, args.repeat,
+                                       args.decimate, args.dtype).result()
+            results.append(case)
+            stages = ", ".join(f"{name} {seconds * 1000:.1f}ms" for name, seconds in case["stages"].items())
+            print(f"{case['case']:40s} RTF {case['real_time_factor']:.4f}  {case['frames_per_second']:8.0f} frames/s  "
+                  f"peak RSS {case['peak_rss_mb']:.0f} MB  [{stages}]")
+
+    report = {"python": platform.python_version(), "machine": platform.machine(), "render": render,
+              "microphone": args.microphone, "decimate": args.decimate, "dtype": args.dtype,
+              "results": results}
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Baseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} case(s) slower than the baseline by more than {args.tolerance:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""Check the recorder against a fake PortAudio input instead of a microphone.
+
+A fake input stream calls the recorder's stream callback from its own thread at
+the real buffer rate, with a sine tone as input and an input overflow flagged
+on every n-th buffer. The script then checks that every buffer reached the WAV
+file intact and that the overflows were counted:
+
+    python benchmarks/check_recorder.py
+    python benchmarks/check_recorder.py --seconds 5 --channels 2 --frames-per-buffer 512
+
+Exits with status 1 if any check fails.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import wave
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from components.recorder import FPB, PA_INPUT_OVERFLOW, RATE, Recorder
+
+
+class FakeInputStream(object):
+    """Stands in for a PyAudio input stream: calls the stream callback from its own
+    thread at the real buffer rate, with a sine tone as input."""
+    def __init__(self, rate, channels, frames_per_buffer, stream_callback, frequency=440.0, status_every=None,
+                 **kwargs):
+        self.rate = rate
+        self.channels = channels
+        self.frames_per_buffer = frames_per_buffer
+        self.callback = stream_callback
+        self.frequency = frequency
+        self.status_every = status_every #Report paInputOverflow on every n-th buffer
+        self.position = 0
+        self.buffers = 0
+        self.active = False
+        self.thread = None
+
+    def samples(self, begin, end):
+        """The tone's int16 samples [begin, end), one per frame."""
+        t = np.arange(begin, end) / self.rate
+        return (10000 * np.sin(2 * np.pi * self.frequency * t)).astype(np.int16)
+
+    def next_buffer(self):
+        samples = self.samples(self.position, self.position + self.frames_per_buffer)
+        self.position += self.frames_per_buffer
+        return np.repeat(samples, self.channels).tobytes()
+
+    def run(self):
+        period = self.frames_per_buffer / self.rate
+        next_time = time.perf_counter()
+        while self.active:
+            self.buffers += 1
+            status = 0
+            if self.status_every and self.buffers % self.status_every == 0:
+                status = PA_INPUT_OVERFLOW
+            self.callback(self.next_buffer(), self.frames_per_buffer, {}, status)
+            next_time += period
+            time.sleep(max(0.0, next_time - time.perf_counter()))
+
+    def start_stream(self):
+        self.active = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop_stream(self):
+        self.active = False
+        if self.thread is not None:
+            self.thread.join()
+
+    def is_active(self):
+        return self.active
+
+    def close(self):
+        self.stop_stream()
+
+
+class FakeAudio(object):
+    """Drop-in for pyaudio.PyAudio that opens FakeInputStreams."""
+    def __init__(self, **stream_options):
+        self.stream_options = stream_options
+        self.streams = []
+
+    def open(self, **kwargs):
+        kwargs.pop("format", None)
+        kwargs.pop("input", None)
+        stream = FakeInputStream(**kwargs, **self.stream_options)
+        self.streams.append(stream)
+        return stream
+
+    def get_sample_size(self, format):
+        return 2
+
+    def terminate(self):
+        pass
+
+
+def record(seconds, channels, rate, frames_per_buffer, status_every):
+    """Record from a FakeAudio; returns (stats, fake stream, samples read back from the WAV file, its frame count)."""
+    audio = FakeAudio(status_every=status_every)
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, "recording.wav")
+        recording = Recorder(channels=channels, rate=rate, frames_per_buffer=frames_per_buffer).open(
+            file_name, audio=audio)
+        recording.start_recording()
+        time.sleep(seconds)
+        recording.stop_recording()
+        recording.wavefile.close()
+        with wave.open(file_name, "rb") as wave_file:
+            wav_frames = wave_file.getnframes()
+            samples = np.frombuffer(wave_file.readframes(wav_frames), dtype=np.int16)
+    return recording.stats(), audio.streams[0], samples, wav_frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record from a fake input stream and check the result.")
+    parser.add_argument("--seconds", type=float, default=2.0, help="length of the recording")
+    parser.add_argument("--channels", type=int, default=1)
+    parser.add_argument("--rate", type=int, default=RATE)
+    parser.add_argument("--frames-per-buffer", type=int, default=FPB)
+    parser.add_argument("--overflow-every", type=int, default=5,
+                        help="flag an input overflow on every n-th buffer (default: 5)")
+    args = parser.parse_args(argv)
+
+    stats, stream, samples, wav_frames = record(args.seconds, args.channels, args.rate, args.frames_per_buffer,
+                                                args.overflow_every)
+    expected = np.repeat(stream.samples(0, stream.position), args.channels)
+    checks = [
+        ("one callback per buffer", stats["callbacks"] == stream.buffers),
+        ("every buffered frame written", stats["frames_written"] == stream.buffers * args.frames_per_buffer),
+        ("WAV frame count matches", wav_frames == stats["frames_written"]),
+        ("WAV samples match the input", np.array_equal(samples, expected)),
+        ("input overflows counted", stats["input_overflows"] == stream.buffers // args.overflow_every),
+        ("no input underflows", stats["input_underflows"] == 0),
+        ("no ring buffer overflows", stats["ring_overflows"] == 0 and stats["dropped_samples"] == 0),
+    ]
+
+    print(", ".join(f"{name} {value}" for name, value in stats.items()))
+    failures = 0
+    for name, passed in checks:
+        print(f"{name:35s} {'ok' if passed else 'FAIL'}")
+        failures += not passed
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""Parameter sweep for the note detection thresholds, scored against reference note lists.
+
+Each file's filtered spectrogram is computed once and kept in a SpectrogramCache;
+every configuration of the grid then only re-runs the note decisions, in
+parallel worker processes. Accuracy is measured against
+samples/reference_notes.json:
+
+    python benchmarks/sweep_parameters.py
+    python benchmarks/sweep_parameters.py --peak-height 25000 50000 --energy-threshold 5e4 1e5 --workers 4
+
+Any FFT threshold below can be given a list of values on the command line;
+the grid is every combination of them.
+"""
+import argparse
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from components.core.fft import FFT
+from components.core.note_events import PAUSE, midi_to_name
+from components.core.spectrogram_cache import SpectrogramCache
+
+# FFT attribute -> default grid
+PARAMETERS = {
+    "energy_threshold": [5e4, 1e5, 2e5],
+    "average_energy_ratio": [0.1],
+    "rolling_window_size": [5, 10, 20],
+    "peak_height": [25000.0, 50000.0, 100000.0],
+    "harmonic_amplitude_ratio": [0.04],
+    "subharmonic_tolerance": [0.02, 0.04],
+}
+
+REFERENCE_FILE = os.path.join(ROOT, "samples", "reference_notes.json")
+
+_worker_state = None
+
+
+def note_sequence(events):
+    """Detected note names without rests and without immediate repeats, as in a melody line."""
+    names = []
+    for midi in events["midi"]:
+        if midi != PAUSE and (not names or names[-1] != midi_to_name(midi)):
+            names.append(midi_to_name(midi))
+    return names
+
+
+def edit_distance(a, b):
+    previous = list(range(len(b) + 1))
+    for i, item in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (item != other)))
+        previous = current
+    return previous[-1]
+
+
+def note_accuracy(events, reference):
+    """1 - (insertions + deletions + substitutions) / len(reference), floored at 0."""
+    return max(0.0, 1 - edit_distance(note_sequence(events), reference) / len(reference))
+
+
+def _init_worker(cache_dir, files, microphone, dsp_options):
+    """Memory-map every file's cached spectrogram once per worker."""
+    global _worker_state
+    cache = SpectrogramCache(cache_dir)
+    entries = {}
+    for file_path in files:
+        fft = FFT(**dsp_options)
+        fs, data = fft.load_audio(file_path, normalize=microphone)
+        magnitudes, energies = cache.load(cache.key(data, fs, fft.cache_settings(fs)))
+        entries[file_path] = (fs, magnitudes, energies)
+    _worker_state = (entries, dsp_options)
+
+
+def evaluate(config, references):
+    """Accuracy and decision time of one configuration on every file."""
+    entries, dsp_options = _worker_state
+    result = {"config": config, "files": {}, "seconds": 0.0}
+    for file_path, (fs, magnitudes, energies) in entries.items():
+        fft = FFT(**dsp_options)
+        for name, value in config.items():
+            setattr(fft, name, value)
+        started = time.perf_counter()
+        plan = fft.cached_plan(fs)
+        events = fft.finish_notes(fft.decide_cached(plan, magnitudes, energies), None, plan.fs)
+        result["seconds"] += time.perf_counter() - started
+        result["files"][os.path.basename(file_path)] = note_accuracy(events, references[os.path.basename(file_path)])
+    result["accuracy"] = sum(result["files"].values()) / len(result["files"])
+    return result
+
+
+def describe(config):
+    return " ".join(f"{name}={value:g}" for name, value in config.items())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep the note detection thresholds against reference notes.")
+    parser.add_argument("files", nargs="*", help="WAV files with an entry in the reference file "
+                                                 "(default: every sample listed there)")
+    for name, default in PARAMETERS.items():
+        parser.add_argument("--" + name.replace("_", "-"), type=float, nargs="+", default=default,
+                            help=f"values to try (default: {' '.join(f'{value:g}' for value in default)})")
+    parser.add_argument("--reference", default=REFERENCE_FILE, help="JSON file mapping file names to note lists")
+    parser.add_argument("--microphone", action="store_true", help="use the microphone normalisation path")
+    parser.add_argument("--decimate", action="store_true", help="analyse at the reduced sample rate")
+    parser.add_argument("--fft-window-seconds", type=float, default=0.20, help="analysis window length")
+    parser.add_argument("--interpolate-peaks", action="store_true", help="locate spectral peaks between bins")
+    parser.add_argument("--cache", metavar="DIR", help="keep the spectrograms here (default: a temporary directory)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--top", type=int, default=10, help="how many of the best configurations to list")
+    parser.add_argument("--save", metavar="FILE", help="write every result as JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.reference) as file:
+        references = json.load(file)
+    files = args.files or [os.path.join(os.path.dirname(args.reference), name) for name in sorted(references)]
+    files = [file_path for file_path in files if os.path.basename(file_path) in references]
+    if not files:
+        parser.error("none of the files has reference notes")
+
+    grid = {name: [int(value) if name == "rolling_window_size" else value for value in getattr(args, name)]
+            for name in PARAMETERS}
+    configs = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+    dsp_options = {"decimate": args.decimate, "fft_window_seconds": args.fft_window_seconds,
+                   "interpolate_peaks": args.interpolate_peaks}
+    cache_dir = args.cache or tempfile.mkdtemp(prefix="spectrograms-")
+
+    try:
+        started = time.perf_counter()
+        cache = SpectrogramCache(cache_dir)
+        for file_path in files:
+            FFT(cache=cache, **dsp_options).transcribe_file(file_path, normalize=args.microphone)
+        print(f"Spectrograms of {len(files)} files ready in {time.perf_counter() - started:.2f}s; "
+              f"evaluating {len(configs)} configurations with {args.workers} workers")
+
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                 initargs=(cache_dir, files, args.microphone, dsp_options)) as executor:
+            results = list(executor.map(evaluate, configs, itertools.repeat(references),
+                                        chunksize=max(1, len(configs) // (4 * args.workers))))
+        print(f"Sweep finished in {time.perf_counter() - started:.2f}s\n")
+    finally:
+        if args.cache is None:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    defaults = FFT()
+    default_config = {name: getattr(defaults, name) for name in PARAMETERS}
+    ranked = sorted(results, key=lambda result: (-result["accuracy"], result["seconds"]))
+    print(f"{'accuracy':>8s} {'ms':>7s}  configuration")
+    for result in ranked[:args.top]:
+        marker = "  (current defaults)" if result["config"] == default_config else ""
+        print(f"{result['accuracy']:8.1%} {result['seconds'] * 1000:7.1f}  {describe(result['config'])}{marker}")
+    for result in results:
+        if result["config"] == default_config and result not in ranked[:args.top]:
+            print(f"{result['accuracy']:8.1%} {result['seconds'] * 1000:7.1f}  {describe(result['config'])}"
+                  f"  (current defaults)")
+
+    print("\nBest configuration per file:")
+    for file_path in files:
+        name = os.path.basename(file_path)
+        best = min(results, key=lambda result: (-result["files"][name], result["seconds"]))
+        print(f"  {name:35s} {best['files'][name]:6.1%}  {describe(best['config'])}")
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump({"microphone": args.microphone, "dsp_options": dsp_options, "results": ranked}, file, indent=2)
+        print(f"Results saved to {args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
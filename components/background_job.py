@@ -0,0 +1,44 @@
+import threading
+from .core.fft import TranscriptionCancelled
+
+class BackgroundJob:
+    """A transcription running on an executor, polled from the Tk main thread.
+
+    The worker only writes plain attributes (frames_done, total_frames); the
+    GUI reads them from an after() callback, so no Tk call ever happens off
+    the main thread.
+    """
+    def __init__(self, executor, function, *args, **kwargs):
+        self.cancel_event = threading.Event()
+        self.frames_done = 0
+        self.total_frames = 0
+        self.future = executor.submit(function, *args, progress=self.update_progress,
+                                      cancel_event=self.cancel_event, **kwargs)
+
+    def update_progress(self, frames_done, total_frames):
+        self.frames_done = frames_done
+        self.total_frames = total_frames
+
+    @property
+    def fraction(self):
+        if not self.total_frames:
+            return 0.0
+        return self.frames_done / self.total_frames
+
+    def cancel(self):
+        self.cancel_event.set()
+        self.future.cancel()
+
+    def done(self):
+        return self.future.done()
+
+    def cancelled(self):
+        if self.future.cancelled():
+            return True
+        return self.future.done() and isinstance(self.future.exception(), TranscriptionCancelled)
+
+    def error(self):
+        """The exception the job failed with, or None if it succeeded or was cancelled."""
+        if not self.future.done() or self.cancelled():
+            return None
+        return self.future.exception()
@@ -0,0 +1,35 @@
+"""Transcription core: signal analysis and score output.
+
+Nothing in this package imports the GUI or an audio device, so it can run on
+headless workers. scipy is imported by the functions that use it, and the
+names below are resolved on first access, so ``from components.core import FFT``
+costs little more than importing NumPy.
+"""
+import importlib
+
+_EXPORTS = {
+    "FFT": "fft",
+    "PlayedNote": "fft",
+    "StreamingDetector": "fft",
+    "TranscriptionCancelled": "fft",
+    "LilyPondConverter": "lilypond_convert",
+    "MidiConverter": "midi_convert",
+    "NOTE_EVENT_DTYPE": "note_events",
+    "PAUSE": "note_events",
+    "LilyPondRenderQueue": "render_queue",
+    "SpectrogramCache": "spectrogram_cache",
+    "WavStream": "streaming",
+    "Tracer": "tracing",
+}
+
+__all__ = sorted(_EXPORTS)
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module("." + _EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,65 @@
+import functools
+import numpy as np
+
+# Window length the peak height threshold is tuned for
+PEAK_HEIGHT_WINDOW_SECONDS = 0.20
+
+NOTE_NAMES = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
+
+def freq_to_number(f):
+    return 12*np.log2(f/27.5) + 9
+
+def note_name(n):
+    n = round(n)
+    note = NOTE_NAMES[n % 12]
+    octave = str(int(n // 12))
+    return note + octave
+
+NOTE_NAME_TABLE = np.array([note_name(n) for n in range(128)], dtype=object)
+
+class AnalysisPlan:
+    """Filter, window and frequency tables that depend only on the sample rate and FFT settings.
+
+    Plans are shared through get_plan, so their arrays must not be modified
+    (sos stays writable only because scipy's sosfilt requires it). source_fs is
+    the rate of the file before decimation; spectrum magnitudes grow with the
+    window size, so peak_height_scale converts thresholds tuned for
+    PEAK_HEIGHT_WINDOW_SECONDS windows at that rate.
+    """
+    def __init__(self, fs, fft_window_seconds, cutoff_freq, filter_order, source_fs=None):
+        self.fs = fs
+        self.source_fs = source_fs if source_fs is not None else fs
+        self.fft_window_seconds = fft_window_seconds
+        self.cutoff_freq = cutoff_freq
+        self.filter_order = filter_order
+
+        import scipy.signal # Deferred: scipy.signal takes over a second to import
+
+        self.window_size = int(fs * fft_window_seconds)
+        self.peak_height_scale = self.window_size / int(self.source_fs * PEAK_HEIGHT_WINDOW_SECONDS)
+        self.sos = scipy.signal.butter(N=filter_order, 
+                                       Wn=cutoff_freq, 
+                                       fs=fs, 
+                                       btype='highpass', 
+                                       analog=False, 
+                                       output='sos')
+        self.window = np.hamming(self.window_size)
+        self.xf = np.fft.rfftfreq(self.window_size, 1 / fs)
+
+        # Bin-to-note lookup: the note each bin frequency maps to (bin 0 has none)
+        self.bin_note_numbers = np.full(len(self.xf), np.nan)
+        self.bin_note_numbers[1:] = freq_to_number(self.xf[1:])
+
+        for array in (self.window, self.xf, self.bin_note_numbers):
+            array.flags.writeable = False
+
+    @functools.cached_property
+    def window_float32(self):
+        window = self.window.astype(np.float32)
+        window.flags.writeable = False
+        return window
+
+@functools.lru_cache(maxsize=16)
+def get_plan(fs, fft_window_seconds, cutoff_freq, filter_order, source_fs=None):
+    """Return the cached AnalysisPlan for these settings, building it on first use."""
+    return AnalysisPlan(fs, fft_window_seconds, cutoff_freq, filter_order, source_fs)
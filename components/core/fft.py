@@ -0,0 +1,671 @@
+import numpy as np
+import copy
+import os
+import math
+from collections import deque
+from .analysis_plan import freq_to_number, get_plan, note_name
+from .lilypond_convert import LilyPondConverter
+from .midi_convert import MidiConverter
+from .onset_refinement import OnsetRefiner
+from .polyphony import KEY_MIDI, get_template_index
+from .note_events import PAUSE, empty_events, events_from_played_notes, events_to_info, midi_to_name, note_number_to_midi
+from .render_queue import report_render
+from .streaming import WavStream, blockwise_sosfiltfilt
+from .tracing import Tracer
+
+class TranscriptionCancelled(Exception):
+    pass
+
+class PlayedNote:
+    __slots__ = ("midi", "onset", "duration")
+
+    def __init__(self, midi, onset, duration):
+        self.midi = midi
+        self.onset = onset
+        self.duration = duration
+
+    @property
+    def note(self):
+        return midi_to_name(self.midi)
+
+class FFT:
+    def __init__(self, fft_window_seconds=0.20, freq_min=27.5, freq_max=4186.0, cutoff_freq=27.5, filter_order=32,
+                 tracer=None, render_queue=None, polyphonic=False, max_polyphony=4, refine_onsets=False,
+                 decimate=False, decimation_harmonics=1, cache=None, dtype=np.float64, interpolate_peaks=False):
+        if polyphonic and refine_onsets:
+            raise ValueError("onset refinement works on single notes; it cannot be combined with polyphonic")
+        self.fft_window_seconds = fft_window_seconds
+        self.freq_min = freq_min
+        self.freq_max = freq_max
+        self.cutoff_freq = cutoff_freq
+        self.filter_order = filter_order
+        
+        self.fft_window_size = None
+        # Detection thresholds; benchmarks/sweep_parameters.py tunes them against reference note lists
+        self.energy_threshold = 1e5 
+        self.average_energy_ratio = 0.1 # Frames quieter than this fraction of the rolling average are pauses
+        self.rolling_window_size = 10
+        self.peak_height = 50000.00 # Smallest spectral peak, for 0.2 s windows at the file's own sample rate
+        self.harmonic_amplitude_ratio = 0.04 # Sub-harmonic peaks must reach this fraction of the fundamental
+        self.subharmonic_tolerance = 0.04 # Allowed distance of f0 / peak from a whole number
+        self.frames_per_block = 256
+        self.filter_padding_seconds = 2.0 # Extra audio filtered on each side of a time range (see analyse_range)
+        self.tracer = tracer if tracer is not None else Tracer()
+        self.render_queue = render_queue
+        self.polyphonic = polyphonic # Report chords from the 88-key template index instead of one note per frame
+        self.max_polyphony = max_polyphony
+        self.refine_onsets = refine_onsets # Re-analyse note changes with short windows (see OnsetRefiner)
+        self.decimate = decimate # Resample to the lowest rate that still holds freq_max (see decimation_factor)
+        self.decimation_harmonics = decimation_harmonics
+        self.cache = cache # SpectrogramCache for re-running the note decisions without the DSP
+        self.dtype = np.dtype(dtype) # float32 halves the memory and bandwidth of the DSP (see filtered_audio)
+        self.interpolate_peaks = interpolate_peaks # Locate peaks between bins, for shorter windows (see peak_offsets)
+
+    def worker_copy(self):
+        """A picklable copy with the same settings, for analysis in another process."""
+        clone = copy.copy(self)
+        clone.tracer = Tracer(debug_frames=self.tracer.debug_frames)
+        clone.render_queue = None
+        clone.cache = None
+        return clone
+
+    def freq_to_number(self, f):
+        return freq_to_number(f)
+    
+    def note_name(self, n):
+        return note_name(n)
+
+    def plan(self, fs, source_fs=None):
+        """The cached AnalysisPlan for this sample rate and the current FFT settings."""
+        return get_plan(fs, self.fft_window_seconds, self.cutoff_freq, self.filter_order, source_fs)
+
+    def decimation_factor(self, fs):
+        """Largest factor of fs that keeps decimation_harmonics harmonics of freq_max inside the new passband.
+
+        resample_poly's anti-aliasing filter starts rolling off a little below the
+        new Nyquist frequency, so only 80% of it is counted as usable. The factor
+        must divide fs, and the decimated window must still hold a whole number
+        of samples, so that the frame grid stays exactly the same; if no factor
+        does, 1 (no decimation) is returned.
+        """
+        bandwidth = self.freq_max * self.decimation_harmonics
+        factor = max(1, int(0.4 * fs // bandwidth))
+        while factor > 1:
+            window_size = (fs // factor) * self.fft_window_seconds
+            if fs % factor == 0 and abs(window_size - round(window_size)) <= 1e-9:
+                return factor
+            factor -= 1
+        return 1
+
+    def decimate_audio(self, audio, fs):
+        """Anti-aliased polyphase decimation of audio to fs / decimation_factor(fs)."""
+        factor = self.decimation_factor(fs)
+        if factor == 1:
+            return audio, fs
+        import scipy.signal
+        return scipy.signal.resample_poly(audio, up=1, down=factor), fs // factor
+
+    def frame_audio(self, audio, first_frame, last_frame):
+        """Return frames [first_frame, last_frame) as rows of a 2-D array, zero-padding the tail frame."""
+        full_frames = len(audio) // self.fft_window_size
+        frames = audio[:full_frames * self.fft_window_size].reshape(full_frames, self.fft_window_size)
+        block = frames[first_frame:min(last_frame, full_frames)]
+        if last_frame > full_frames:
+            tail = np.zeros((1, self.fft_window_size), dtype=audio.dtype)
+            tail[0, :len(audio) - full_frames * self.fft_window_size] = audio[full_frames * self.fft_window_size:]
+            block = np.concatenate([block, tail])
+        return block
+
+    def frame_energies(self, audio, total_frames):
+        """Mean energy of every frame, computed block by block."""
+        energies = np.empty(total_frames)
+        for first_frame in range(0, total_frames, self.frames_per_block):
+            last_frame = min(first_frame + self.frames_per_block, total_frames)
+            block = self.frame_audio(audio, first_frame, last_frame)
+            energies[first_frame:last_frame] = np.sum(block ** 2, axis=1) / self.fft_window_size
+        return energies
+
+    def rolling_average(self, energies):
+        """Mean of each frame's energy and the (rolling_window_size - 1) frames before it."""
+        window = min(self.rolling_window_size, len(energies))
+        averages = np.empty(len(energies))
+        for frame_number in range(window - 1):
+            averages[frame_number] = np.mean(energies[:frame_number + 1])
+        if len(energies):
+            windows = np.lib.stride_tricks.sliding_window_view(energies, window)
+            averages[window - 1:] = np.mean(windows, axis=1)
+        return averages
+
+    def spectrogram(self, audio, window, first_frame, last_frame, rows=None):
+        """Magnitude spectra of the Hamming-windowed frames [first_frame, last_frame), or only the given rows of it."""
+        block = self.frame_audio(audio, first_frame, last_frame)
+        if rows is not None:
+            block = block[rows]
+        return self.magnitudes(block * window)
+
+    def magnitudes(self, windowed):
+        """Magnitude spectra of windowed frames (along the last axis), in the frames' precision."""
+        if windowed.dtype == np.float32:
+            import scipy.fft # numpy.fft computes in float64 whatever the input; scipy.fft has float32 kernels
+            return np.abs(scipy.fft.rfft(windowed, axis=-1))
+        return np.abs(np.fft.rfft(windowed, axis=-1))
+
+    def high_pass_sos(self, fs):
+        return self.plan(fs).sos
+
+    def high_pass_filter(self, audio, fs, progress=None):
+        """Zero-phase high-pass filter of audio in the compute dtype; progress is passed to blockwise_sosfiltfilt."""
+        return blockwise_sosfiltfilt(self.high_pass_sos(fs), audio, self.dtype, progress=progress)
+
+    def analysis_window(self, plan):
+        """The plan's Hamming window in the compute dtype."""
+        return plan.window_float32 if self.dtype == np.float32 else plan.window
+
+    def scale_samples(self, data, scale_by):
+        """data scaled so that scale_by becomes 32767, in the compute dtype."""
+        if self.dtype == np.float32:
+            return data / np.float32(scale_by) * np.float32(32767)
+        return (data / scale_by) * 32767
+    
+    def load_audio(self, file_path, normalize=False):
+        import scipy.io.wavfile as wavfile
+        with self.tracer.stage("load"):
+            fs, data = wavfile.read(file_path)
+
+            if normalize:
+                if(np.abs(data.min())>np.abs(data.max())):
+                    data = self.scale_samples(data, data.min())
+                else:
+                    data = self.scale_samples(data, data.max())
+
+        self.tracer.count("samples", len(data))
+        return fs, data
+
+    def transcribe_file(self, file_path, normalize=False, streaming=False, progress=None, cancel_event=None):
+        """Detect the notes of a WAV file without writing any output.
+
+        progress, if given, is called as progress(frames_done, total_frames), where
+        the high-pass filter counts as a first pass over the frames; setting
+        cancel_event (a threading.Event) makes the analysis raise TranscriptionCancelled.
+        """
+        if streaming:
+            return self.analyse_stream(WavStream(file_path, normalize=normalize), progress, cancel_event)
+
+        fs, data = self.load_audio(file_path, normalize)
+        return self.analyse(fs, data, progress, cancel_event)
+
+    def transcribe_range(self, file_path, start=0.0, end=None, normalize=False, progress=None, cancel_event=None):
+        """Detect the notes between start and end seconds of a WAV file without reading the rest of it.
+
+        The file is memory-mapped; only the range plus the filter padding and the
+        rolling-average warm-up is read. Normalisation still scans the whole
+        file for its peak, so that the range is scaled like the full file.
+        """
+        stream = WavStream(file_path, normalize=normalize)
+        self.tracer.count("samples", len(stream))
+        start_frame, end_frame = self.frame_range(stream.fs, len(stream), start, end)
+        return self.analyse_range(stream.fs, stream.data, start_frame, end_frame, stream.scale_by,
+                                  progress, cancel_event)
+
+    def frame_range(self, fs, length, start=0.0, end=None):
+        """Frames [start_frame, end_frame) of the full-file frame grid that cover start..end seconds."""
+        total_frames = math.ceil(length / int(fs * self.fft_window_seconds))
+        # Rounding first keeps e.g. 0.6 / 0.2 = 2.9999999999999996 on frame 3
+        start_frame = min(max(0, math.floor(round(start / self.fft_window_seconds, 9))), total_frames)
+        if end is None:
+            return start_frame, total_frames
+        return start_frame, min(max(start_frame, math.ceil(round(end / self.fft_window_seconds, 9))), total_frames)
+
+    def microphone_data_preparation(self, file_path, streaming=False, progress=None, cancel_event=None):
+        notes = self.transcribe_file(file_path, normalize=True, streaming=streaming,
+                                     progress=progress, cancel_event=cancel_event)
+        self.export_notes(notes, file_path)
+
+    def music_file_data_preparation(self, file_path, streaming=False, progress=None, cancel_event=None):
+        notes = self.transcribe_file(file_path, streaming=streaming, progress=progress, cancel_event=cancel_event)
+        self.export_notes(notes, file_path)
+
+    def report_progress(self, progress, cancel_event, frames_done, total_frames):
+        if cancel_event is not None and cancel_event.is_set():
+            raise TranscriptionCancelled()
+        if progress is not None:
+            progress(frames_done, total_frames)
+
+    def filtered_audio(self, fs, data, progress=None, cancel_event=None):
+        """First channel of data, decimated if enabled and high-pass filtered; returns (audio, fs, plan).
+
+        The filter counts as a first pass over the frames: it reports the first
+        half of the progress, and checks cancel_event after every block. Wrap
+        progress with progress_after_filter for the pass that follows.
+
+        Integer samples are only converted to the compute dtype here, one channel
+        and (unless decimating) one filter block at a time. In float32 mode the
+        filtered signal, the frames and the spectra are float32, while the filter
+        keeps float64 state (see blockwise_sosfiltfilt) and frame energies are
+        stored as float64.
+        """
+        if len(data.shape) == 1:
+            audio = data
+        else:
+            audio = data.T[0]
+
+        source_fs = fs
+        self.report_progress(progress, cancel_event, 0, 1)
+        if self.decimate:
+            with self.tracer.stage("decimate"):
+                audio, fs = self.decimate_audio(audio.astype(self.dtype, copy=False), fs)
+
+        plan = self.plan(fs, source_fs)
+        self.fft_window_size = plan.window_size
+        total_frames = math.ceil(len(audio) / plan.window_size)
+
+        def filter_progress(samples_done, total_samples):
+            self.report_progress(progress, cancel_event, total_frames * samples_done // total_samples,
+                                 2 * total_frames)
+
+        with self.tracer.stage("high_pass"):
+            audio = np.ascontiguousarray(self.high_pass_filter(audio, fs, filter_progress))
+        return audio, fs, plan
+
+    def progress_after_filter(self, progress):
+        """progress for the frame pass after filtered_audio, which reported the first half of the work."""
+        if progress is None:
+            return None
+        return lambda frames_done, total_frames: progress(total_frames + frames_done, 2 * total_frames)
+
+    def analyse(self, fs, data, progress=None, cancel_event=None):
+        if self.cache is not None:
+            return self.analyse_cached(fs, data, progress, cancel_event)
+
+        audio, fs, plan = self.filtered_audio(fs, data, progress, cancel_event)
+        progress = self.progress_after_filter(progress)
+        total_frames = math.ceil(len(audio) / self.fft_window_size)
+        self.report_progress(progress, cancel_event, 0, total_frames)
+
+        # First pass: energy envelope for the whole signal; the second pass only
+        # transforms the frames that pass the energy gate
+        with self.tracer.stage("energy"):
+            energies = self.frame_energies(audio, total_frames)
+
+        def spectra(first_frame, last_frame, rows):
+            return self.spectrogram(audio, self.analysis_window(plan), first_frame, last_frame, rows)
+
+        current_notes = self.decide_frames(plan, energies, spectra, progress, cancel_event)
+        return self.finish_notes(current_notes, audio, fs)
+
+    def analyse_range(self, fs, data, start_frame, end_frame, scale_by=None, progress=None, cancel_event=None):
+        """analyse() restricted to frames [start_frame, end_frame) of the full-file frame grid.
+
+        data may be a memory map; only the samples needed are read. Onsets stay
+        relative to the start of the file, and a note that continues past either
+        end of the range is cut at it.
+        """
+        current_notes, audio, fs = self.range_decisions(fs, data, start_frame, end_frame, scale_by,
+                                                        progress, cancel_event)
+        return self.finish_notes(current_notes, audio, fs, start_frame)
+
+    def range_decisions(self, fs, data, start_frame, end_frame, scale_by=None, progress=None, cancel_event=None):
+        """Per-frame decisions for frames [start_frame, end_frame), and the filtered audio from start_frame on.
+
+        The rolling average of the first frames needs the energies of the
+        rolling_window_size - 1 frames before them, so those are analysed too
+        and dropped afterwards. filter_padding_seconds more audio (whole frames)
+        is filtered on each side, so that sosfiltfilt's edge transients die out
+        before the range; decisions then match a whole-file pass except where a
+        value sits within rounding error of a threshold.
+        """
+        source_window_size = int(fs * self.fft_window_seconds)
+        end_frame = min(end_frame, math.ceil(len(data) / source_window_size))
+        warmup = min(start_frame, self.rolling_window_size - 1)
+        first_frame = start_frame - warmup
+        padding = math.ceil(self.filter_padding_seconds / self.fft_window_seconds)
+        pad_before = min(first_frame, padding)
+
+        segment = data[(first_frame - pad_before) * source_window_size:(end_frame + padding) * source_window_size]
+        if len(segment.shape) > 1:
+            segment = segment[:, 0]
+        if scale_by is not None:
+            segment = self.scale_samples(segment, scale_by)
+        audio, fs, plan = self.filtered_audio(fs, segment, progress, cancel_event)
+        progress = self.progress_after_filter(progress)
+
+        # Whole padding frames keep the filtered segment on the full-file frame grid
+        total_frames = max(0, end_frame - first_frame)
+        audio = audio[pad_before * plan.window_size:(pad_before + total_frames) * plan.window_size]
+        self.report_progress(progress, cancel_event, 0, total_frames)
+
+        with self.tracer.stage("energy"):
+            energies = self.frame_energies(audio, total_frames)
+
+        def spectra(first, last, rows):
+            return self.spectrogram(audio, self.analysis_window(plan), first, last, rows)
+
+        current_notes = self.decide_frames(plan, energies, spectra, progress, cancel_event)
+        return current_notes[warmup:], audio[warmup * plan.window_size:], fs
+
+    def cache_settings(self, fs):
+        """Everything besides the samples that changes the filtered spectrogram."""
+        return {"fft_window_seconds": self.fft_window_seconds, "cutoff_freq": self.cutoff_freq,
+                "filter_order": self.filter_order,
+                "decimation_factor": self.decimation_factor(fs) if self.decimate else 1,
+                "dtype": self.dtype.name}
+
+    def analyse_cached(self, fs, data, progress=None, cancel_event=None):
+        """analyse() through the spectrogram cache: the DSP runs only the first time a file is seen."""
+        source_fs = fs
+        settings = self.cache_settings(fs)
+        key = self.cache.key(data, fs, settings)
+        entry = self.cache.load(key)
+        audio = None
+        if entry is None:
+            audio, fs, plan = self.filtered_audio(fs, data, progress, cancel_event)
+            progress = self.progress_after_filter(progress)
+            total_frames = math.ceil(len(audio) / self.fft_window_size)
+            magnitudes, energies = self.cache.create(key, total_frames, len(plan.xf), self.dtype)
+            try:
+                for first_frame in range(0, total_frames, self.frames_per_block):
+                    last_frame = min(first_frame + self.frames_per_block, total_frames)
+                    with self.tracer.stage("fft"):
+                        magnitudes[first_frame:last_frame] = self.spectrogram(audio, self.analysis_window(plan),
+                                                                              first_frame, last_frame)
+                    with self.tracer.stage("energy"):
+                        energies[first_frame:last_frame] = self.frame_energies(
+                            audio[first_frame * self.fft_window_size:], last_frame - first_frame)
+                    self.report_progress(progress, cancel_event, last_frame, total_frames)
+                magnitudes.flush()
+                energies.flush()
+            except BaseException:
+                self.cache.discard(key)
+                raise
+            self.cache.commit(key)
+            progress_after_fill = progress if total_frames == 0 else None
+        else:
+            progress_after_fill = progress
+            self.tracer.count("cache_hits")
+            magnitudes, energies = entry
+            plan = self.cached_plan(fs)
+
+        # Filling the cache already reported progress; the decisions alone take milliseconds
+        current_notes = self.decide_cached(plan, magnitudes, energies, progress_after_fill, cancel_event)
+        if self.refine_onsets and audio is None:
+            # Onset refinement looks at the filtered signal itself, which is not cached
+            audio, fs, plan = self.filtered_audio(source_fs, data, cancel_event=cancel_event)
+        return self.finish_notes(current_notes, audio, plan.fs)
+
+    def cached_plan(self, fs):
+        """The plan that cached spectrograms of an fs-rate file were computed with."""
+        plan = self.plan(fs // self.cache_settings(fs)["decimation_factor"], fs)
+        self.fft_window_size = plan.window_size
+        return plan
+
+    def decide_cached(self, plan, magnitudes, energies, progress=None, cancel_event=None):
+        """decide_frames() on a full cached spectrogram and its frame energies."""
+        def spectra(first_frame, last_frame, rows):
+            return magnitudes[first_frame + rows]
+
+        return self.decide_frames(plan, np.asarray(energies), spectra, progress, cancel_event)
+
+    def decide_frames(self, plan, energies, spectra, progress=None, cancel_event=None):
+        """Per-frame notes (or piano-roll rows) from the frame energies.
+
+        spectra(first_frame, last_frame, rows) returns the magnitude spectra of
+        the given rows of a block; it is only called for frames that pass the
+        energy gate.
+        """
+        total_frames = len(energies)
+        self.tracer.count("frames", total_frames)
+        with self.tracer.stage("energy"):
+            averages = self.rolling_average(energies)
+            loud = self.loud_frames(energies, averages)
+        self.tracer.count("gated_frames", int(np.count_nonzero(~loud)))
+        if self.tracer.debug_frames:
+            for frame_number in np.flatnonzero(~loud):
+                self.tracer.frame(int(frame_number), energy=energies[frame_number],
+                                  average_energy=averages[frame_number], loud=False)
+
+        if self.polyphonic:
+            current_notes = np.zeros((total_frames, len(KEY_MIDI)), dtype=bool)
+        else:
+            current_notes = np.full(total_frames, PAUSE, dtype=np.int16)
+
+        for first_frame in range(0, total_frames, self.frames_per_block):
+            last_frame = min(first_frame + self.frames_per_block, total_frames)
+            rows = np.flatnonzero(loud[first_frame:last_frame])
+            if len(rows) == 0:
+                self.report_progress(progress, cancel_event, last_frame, total_frames)
+                continue
+            frame_numbers = first_frame + rows
+
+            with self.tracer.stage("fft"):
+                magnitudes = spectra(first_frame, last_frame, rows)
+
+            with self.tracer.stage("pitch"):
+                if self.polyphonic:
+                    current_notes[frame_numbers] = self.decide_chords(magnitudes, plan, energies[frame_numbers],
+                                                                      averages[frame_numbers])
+                else:
+                    current_notes[frame_numbers] = self.decide_notes(magnitudes, plan, energies[frame_numbers],
+                                                                     averages[frame_numbers], frame_numbers)
+            self.report_progress(progress, cancel_event, last_frame, total_frames)
+        return current_notes
+
+    def finish_notes(self, current_notes, audio, fs, first_frame=0):
+        """Merge per-frame decisions into note events and refine their onsets if enabled.
+
+        first_frame is the frame number of current_notes[0] and of the start of audio.
+        """
+        with self.tracer.stage("merge"):
+            if self.polyphonic:
+                return self.merge_chords(current_notes, first_frame)
+            events = self.merge_notes(current_notes, first_frame)
+
+        if self.refine_onsets:
+            with self.tracer.stage("refine"):
+                events = OnsetRefiner(self).refine(audio, fs, events, first_frame * self.fft_window_seconds)
+        return events
+
+    def runs(self, changes, total_frames):
+        """Start frame, frame count and duration of each run, given the frames where a new run begins."""
+        starts = np.concatenate([[0], changes])
+        lengths = np.diff(np.append(starts, total_frames))
+        # cumsum adds one window at a time, exactly like growing a note frame by frame
+        durations = np.cumsum(np.full(lengths.max(), self.fft_window_seconds))
+        return starts, lengths, durations[lengths - 1]
+
+    def merge_notes(self, current_notes, first_frame=0):
+        """Run-length merge per-frame MIDI numbers, starting at first_frame, into a note event array."""
+        if len(current_notes) == 0:
+            return empty_events()
+        starts, lengths, durations = self.runs(np.flatnonzero(current_notes[1:] != current_notes[:-1]) + 1,
+                                               len(current_notes))
+        events = empty_events(len(starts))
+        events["midi"] = current_notes[starts]
+        events["onset"] = (first_frame + starts) * self.fft_window_seconds
+        events["duration"] = durations
+        self.tracer.count("notes", len(events))
+        return events
+
+    def merge_chords(self, piano_roll, first_frame=0):
+        """Merge a frames x 88 piano roll into events; notes of one chord share onset and duration."""
+        if len(piano_roll) == 0:
+            return empty_events()
+        changes = np.flatnonzero((piano_roll[1:] != piano_roll[:-1]).any(axis=1)) + 1
+        starts, lengths, durations = self.runs(changes, len(piano_roll))
+        chords = piano_roll[starts]
+        # Every sounding key becomes one row; a segment with no keys becomes a single rest
+        segments, keys = np.nonzero(chords)
+        rests = np.flatnonzero(~chords.any(axis=1))
+        segments = np.concatenate([segments, rests])
+        midis = np.concatenate([KEY_MIDI[keys], np.full(len(rests), PAUSE)])
+        order = np.lexsort((midis, segments))
+        events = empty_events(len(order))
+        events["midi"] = midis[order]
+        events["onset"] = (first_frame + starts[segments[order]]) * self.fft_window_seconds
+        events["duration"] = durations[segments[order]]
+        self.tracer.count("notes", len(events))
+        return events
+
+    def analyse_stream(self, stream, progress=None, cancel_event=None):
+        """Detect notes frame by frame from a WavStream, with memory bounded by one block."""
+        if self.decimate:
+            raise ValueError("decimation needs the whole signal; transcribe without streaming instead")
+        plan = self.plan(stream.fs)
+        self.fft_window_size = plan.window_size
+        total_frames = math.ceil(len(stream) / self.fft_window_size)
+        detector = StreamingDetector(self, stream.fs)
+        for frame in stream.frames(self.fft_window_size, plan.sos, self.frames_per_block, self.dtype):
+            detector.push(frame)
+            self.report_progress(progress, cancel_event, detector.frame_number, total_frames)
+        return events_from_played_notes(detector.notes)
+
+    def estimate_pitch(self, magnitudes, plan):
+        """Vectorized fundamental/harmonic analysis of a block of spectrogram rows.
+
+        The strongest spectral peak of each frame is taken as the fundamental. Peaks
+        of at least harmonic_amplitude_ratio of its amplitude sitting close to f0/2
+        or f0/3 mean that the real base frequency is lower; the base is then f0
+        divided by the least common multiple of those divisors. Returns (pitches,
+        note_numbers), with NaN for frames that have no peak.
+
+        The float GCD this replaced collapsed to about 1e-6 Hz (a pause) whenever
+        f0 and a sub-harmonic peak were not in an exact bin ratio, e.g. 440 Hz
+        with a peak at 146.7 Hz; such frames now get f0/3 (D3 in that example).
+        """
+        rows = np.arange(len(magnitudes))
+        peak_mask = np.zeros(magnitudes.shape, dtype=bool)
+        inner = magnitudes[:, 1:-1]
+        peak_height = self.peak_height * plan.peak_height_scale
+        peak_mask[:, 1:-1] = (inner > magnitudes[:, :-2]) & (inner > magnitudes[:, 2:]) & (inner >= peak_height)
+        has_peak = peak_mask.any(axis=1)
+
+        fundamental_bins = np.argmax(np.where(peak_mask, magnitudes, -np.inf), axis=1)
+        if self.interpolate_peaks:
+            peak_freqs = plan.xf + self.peak_offsets(magnitudes, peak_mask) * plan.xf[1]
+            fundamental_freqs = peak_freqs[rows, fundamental_bins]
+        else:
+            peak_freqs = plan.xf[None, :]
+            fundamental_freqs = plan.xf[fundamental_bins]
+        fundamental_amplitudes = magnitudes[rows, fundamental_bins]
+
+        # Peaks at or below the fundamental that divide it (almost) exactly 1, 2 or 3 times
+        candidates = peak_mask & (magnitudes >= self.harmonic_amplitude_ratio * fundamental_amplitudes[:, None])
+        candidates &= peak_freqs <= fundamental_freqs[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratios = fundamental_freqs[:, None] / peak_freqs
+            multiples = np.rint(ratios)
+            subharmonics = candidates & (np.abs(ratios - multiples) <= self.subharmonic_tolerance) & (multiples <= 3)
+
+        divisors = np.ones(len(magnitudes))
+        divisors[(subharmonics & (multiples == 2)).any(axis=1)] *= 2
+        divisors[(subharmonics & (multiples == 3)).any(axis=1)] *= 3
+
+        pitches = np.where(has_peak, fundamental_freqs / divisors, np.nan)
+        if self.interpolate_peaks:
+            return pitches, freq_to_number(pitches)
+        note_numbers = np.where(has_peak, plan.bin_note_numbers[fundamental_bins] - 12 * np.log2(divisors), np.nan)
+        return pitches, note_numbers
+
+    def peak_offsets(self, magnitudes, peak_mask):
+        """Position of each spectral peak between bins, as an offset of -0.5..0.5 bins (0 elsewhere).
+
+        A parabola through the log magnitudes of a peak bin and its two
+        neighbours has its vertex at the true frequency to within a few
+        hundredths of a bin for a Hamming window, so pitch resolution no longer
+        depends on the bin width 1 / fft_window_seconds.
+        """
+        offsets = np.zeros(magnitudes.shape)
+        rows, bins = np.nonzero(peak_mask)
+        tiny = np.finfo(magnitudes.dtype).tiny
+        left, centre, right = (np.log(np.maximum(magnitudes[rows, bins + shift], tiny)) for shift in (-1, 0, 1))
+        # Peak bins are strictly above both neighbours, so the curvature is negative
+        offsets[rows, bins] = 0.5 * (left - right) / (left - 2 * centre + right)
+        return offsets
+
+    def loud_frames(self, energies, averages):
+        """Frames passing the energy gate; the rest are pauses."""
+        return (energies >= self.energy_threshold) & (energies >= averages * self.average_energy_ratio)
+
+    def decide_chords(self, magnitudes, plan, energies, averages):
+        """Piano roll (frames x 88 keys) for a block of spectrogram rows, scored against the key templates."""
+        active = get_template_index(plan).detect(magnitudes, max_notes=self.max_polyphony)
+        return active & self.loud_frames(energies, averages)[:, None]
+
+    def decide_notes(self, magnitudes, plan, energies, averages, frame_numbers):
+        """MIDI numbers (or PAUSE) for spectrogram rows, given their frame energies and frame numbers."""
+        pitches, note_numbers = self.estimate_pitch(magnitudes, plan)
+        loud = self.loud_frames(energies, averages)
+        voiced = loud & (pitches >= self.freq_min) & (pitches <= self.freq_max)
+        current_notes = np.full(len(magnitudes), PAUSE, dtype=np.int16)
+        current_notes[voiced] = note_number_to_midi(note_numbers[voiced])
+        self.tracer.count("voiced_frames", int(np.count_nonzero(voiced)))
+
+        if self.tracer.debug_frames:
+            for row in range(len(magnitudes)):
+                self.tracer.frame(int(frame_numbers[row]), energy=energies[row], average_energy=averages[row],
+                                  loud=bool(loud[row]), pitch=pitches[row], midi=int(current_notes[row]))
+        return current_notes
+
+    def process_audio_file(self, fs, data, file_path):
+        notes = self.analyse(fs, data)
+        self.export_notes(notes, file_path)
+
+    def notes_to_info(self, notes):
+        return events_to_info(notes)
+
+    def export_notes(self, notes, file_path, output_dir=None, render=True):
+        """Write the notes as a LilyPond file next to file_path (or in output_dir) and optionally render it."""
+        converter = LilyPondConverter(notes, tracer=self.tracer)
+        lilypond_file_name = self.output_file_name(file_path, ".ly", output_dir)
+        converter.write_to_file(lilypond_file_name)
+        if render:
+            if self.render_queue is not None:
+                self.render_queue.submit(lilypond_file_name, callback=report_render)
+            else:
+                converter.run_lilypond(lilypond_file_name)
+        return lilypond_file_name
+
+    def export_midi(self, notes, file_path, output_dir=None):
+        """Write the notes as a Standard MIDI File next to file_path (or in output_dir)."""
+        midi_file_name = self.output_file_name(file_path, ".mid", output_dir)
+        MidiConverter(notes, tracer=self.tracer).write_to_file(midi_file_name)
+        return midi_file_name
+
+    def output_file_name(self, file_path, extension, output_dir=None):
+        file_name = os.path.splitext(file_path)[0] + extension
+        if output_dir is not None:
+            file_name = os.path.join(output_dir, os.path.basename(file_name))
+        return file_name
+
+class StreamingDetector:
+    """Runs the FFT note decision on one frame at a time, keeping the rolling energy state."""
+    def __init__(self, fft, fs):
+        if fft.polyphonic:
+            raise ValueError("chord detection is not available frame by frame; transcribe without streaming instead")
+        self.fft = fft
+        self.plan = fft.plan(fs)
+        self.energy_list = deque(maxlen=fft.rolling_window_size)
+        self.frame_number = 0
+        self.notes = []
+
+    def push(self, frame):
+        """Analyse one filtered frame and return the PlayedNote it belongs to."""
+        tracer = self.fft.tracer
+        with tracer.stage("fft"):
+            frame = np.asarray(frame, dtype=self.fft.dtype)
+            fft_magnitude = self.fft.magnitudes(frame * self.fft.analysis_window(self.plan))
+            frame_energy = np.sum(frame ** 2) / len(frame)
+            self.energy_list.append(frame_energy)
+            avg_energy = np.mean(self.energy_list)
+
+        with tracer.stage("pitch"):
+            current_note = int(self.fft.decide_notes(fft_magnitude[None, :], self.plan, np.array([frame_energy]),
+                                                     np.array([avg_energy]), np.array([self.frame_number]))[0])
+        tracer.count("frames")
+        self.frame_number += 1
+
+        if self.notes and current_note == self.notes[-1].midi:
+            self.notes[-1].duration += self.fft.fft_window_seconds
+        else:
+            onset = (self.frame_number - 1) * self.fft.fft_window_seconds
+            self.notes.append(PlayedNote(midi=current_note, onset=onset, duration=self.fft.fft_window_seconds))
+        return self.notes[-1]
@@ -0,0 +1,114 @@
+import itertools
+import os
+import shutil
+import subprocess
+from .note_events import PAUSE, midi_octave
+from .tracing import Tracer
+
+LILYPOND_PITCHES = ["c", "cis", "d", "dis", "e", "f", "fis", "g", "gis", "a", "ais", "b"]
+
+LILYPOND_PATH = "lilypond/lilypond-2.24.4/bin/lilypond.exe"
+
+def lilypond_executable():
+    """The bundled LilyPond if present, otherwise a lilypond found on PATH."""
+    if os.path.exists(LILYPOND_PATH):
+        return LILYPOND_PATH
+    return shutil.which("lilypond") or LILYPOND_PATH
+
+class LilyPondConverter:
+    def __init__(self, events, tracer=None):
+        self.events = events
+        self.tracer = tracer if tracer is not None else Tracer()
+        self.bass_notes = ''
+        self.treble_notes = ''
+    
+    def note_to_lilypond_note(self, midi, base_octave = 3):
+        octave_offset = midi_octave(midi) - base_octave
+
+        octave_suffix = ''
+        if octave_offset > 0:
+            octave_suffix = octave_offset * "'"
+        elif octave_offset < 0:
+            octave_suffix = -octave_offset * ","
+
+        return LILYPOND_PITCHES[midi % 12] + octave_suffix
+
+
+    def chord_to_lilypond(self, midis):
+        """A rest, a single note or a <...> chord, without duration."""
+        if not midis:
+            return "r"
+        if len(midis) == 1:
+            return self.note_to_lilypond_note(midis[0])
+        return "<" + " ".join(self.note_to_lilypond_note(midi) for midi in midis) + ">"
+
+    def duration_to_lilypond(self, duration):
+        if duration == 1.0:
+            return '4'  # quarter note
+        elif duration == 0.5:
+            return '8'  # eighth note
+        elif duration == 0.25:
+            return '16' # sixteenth note
+        elif duration == 2.0:
+            return '2'  # half note
+        elif duration == 4.0:
+            return '1'  # whole note
+        else:
+            if duration < 0.375:
+                return '16'
+            elif duration < 0.75:
+                return '8'
+            elif duration < 1.5:
+                return '4'
+            elif duration < 3:
+                return '2'
+            else:
+                return '1'
+    
+    def convert(self):
+        lilypond_treble_notes = []
+        lilypond_bass_notes = []
+        use_bass_clef = False
+        
+        rows = zip(self.events["onset"].tolist(), self.events["midi"].tolist(), self.events["duration"].tolist())
+        # Rows sharing an onset are one chord (polyphonic mode); otherwise every group is a single note or rest
+        for onset, chord in itertools.groupby(rows, key=lambda row: row[0]):
+            chord = list(chord)
+            duration = chord[0][2]
+            lp_duration = self.duration_to_lilypond(duration)
+            midis = [midi for _, midi, _ in chord if midi != PAUSE]
+
+            treble = [midi for midi in midis if midi_octave(midi) >= 4]
+            bass = [midi for midi in midis if midi_octave(midi) < 4]
+            if bass:
+                use_bass_clef = True
+            lilypond_treble_notes.append(self.chord_to_lilypond(treble) + lp_duration)
+            lilypond_bass_notes.append(self.chord_to_lilypond(bass) + lp_duration)
+
+        if use_bass_clef:
+                    treble_staff = "{ \\clef treble  " + " ".join(lilypond_treble_notes) + " }"
+                    bass_staff = "{ \\clef bass " + " ".join(lilypond_bass_notes) + "}"
+                    lilypond_string = "<<\n  \\new Staff " + treble_staff + "\n  \\new Staff " + bass_staff + "\n>>"
+        else:
+            lilypond_string = " ".join(lilypond_treble_notes)
+
+        return lilypond_string
+    
+    def document(self):
+        """The complete .ly file contents."""
+        return "\\version \"2.24.4\"\n{\n" + self.convert() + "\n}\n"
+
+    def write_to_file(self, file_name):
+        with self.tracer.stage("lilypond_write"):
+            lilypond_string = self.document()
+            with open(file_name, 'w') as file:
+                file.write(lilypond_string)
+        print(f"LilyPond file written to {file_name}")
+    
+    def run_lilypond(self, file_name):
+        try:
+            with self.tracer.stage("lilypond_render"):
+                subprocess.run([lilypond_executable(), file_name], check=True)
+            print(f"PDF successfully created for {file_name}")
+        except subprocess.CalledProcessError as e:
+            print(f"An error occurred: {e}")
@@ -0,0 +1,68 @@
+import struct
+import numpy as np
+from .note_events import PAUSE
+from .tracing import Tracer
+
+# One quarter note per second (60 bpm), so a tick is exactly 1/480 s
+TICKS_PER_QUARTER = 480
+MICROSECONDS_PER_QUARTER = 1000000
+
+NOTE_OFF = 0x80
+NOTE_ON = 0x90
+
+def variable_length(value):
+    """Standard MIDI File variable-length quantity: 7 bits per byte, high bit set on all but the last."""
+    encoded = bytearray([value & 0x7F])
+    value >>= 7
+    while value:
+        encoded.insert(0, (value & 0x7F) | 0x80)
+        value >>= 7
+    return bytes(encoded)
+
+class MidiConverter:
+    """Writes note events as a single-track Standard MIDI File, keeping their exact onsets and durations."""
+    def __init__(self, events, tracer=None, velocity=80, channel=0):
+        self.events = events
+        self.tracer = tracer if tracer is not None else Tracer()
+        self.velocity = velocity
+        self.channel = channel
+
+    def seconds_to_ticks(self, seconds):
+        return np.rint(np.asarray(seconds) * TICKS_PER_QUARTER).astype(np.int64)
+
+    def track_events(self):
+        """(tick, status, midi) of every note-on and note-off, in playing order.
+
+        At equal ticks note-offs come first, so a note repeated back to back is
+        released before it is struck again.
+        """
+        notes = self.events[self.events["midi"] != PAUSE]
+        starts = self.seconds_to_ticks(notes["onset"])
+        ends = np.maximum(self.seconds_to_ticks(notes["onset"] + notes["duration"]), starts + 1)
+        ticks = np.concatenate([ends, starts])
+        statuses = np.concatenate([np.full(len(notes), NOTE_OFF), np.full(len(notes), NOTE_ON)])
+        midis = np.concatenate([notes["midi"], notes["midi"]])
+        order = np.lexsort((midis, statuses, ticks))
+        return zip(ticks[order].tolist(), statuses[order].tolist(), midis[order].tolist())
+
+    def convert(self):
+        """The complete .mid file as bytes."""
+        track = bytearray()
+        track += b"\x00\xff\x51\x03" + MICROSECONDS_PER_QUARTER.to_bytes(3, "big")
+        previous_tick = 0
+        for tick, status, midi in self.track_events():
+            velocity = self.velocity if status == NOTE_ON else 0
+            track += variable_length(tick - previous_tick)
+            track += bytes([status | self.channel, midi, velocity])
+            previous_tick = tick
+        track += b"\x00\xff\x2f\x00"
+
+        header = b"MThd" + struct.pack(">IHHH", 6, 0, 1, TICKS_PER_QUARTER)
+        return header + b"MTrk" + struct.pack(">I", len(track)) + bytes(track)
+
+    def write_to_file(self, file_name):
+        with self.tracer.stage("midi_write"):
+            midi_bytes = self.convert()
+            with open(file_name, 'wb') as file:
+                file.write(midi_bytes)
+        print(f"MIDI file written to {file_name}")
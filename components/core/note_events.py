@@ -0,0 +1,37 @@
+import numpy as np
+from .analysis_plan import NOTE_NAME_TABLE
+
+# One row per note (or rest): MIDI number, onset and duration in seconds
+NOTE_EVENT_DTYPE = np.dtype([("midi", np.int16), ("onset", np.float64), ("duration", np.float64)])
+
+# MIDI value used for rests
+PAUSE = -1
+
+def note_number_to_midi(note_numbers):
+    """FFT note numbers count from C0 = 0 (A0 = 9); MIDI counts from C-1, so A0 = 21."""
+    return np.rint(note_numbers).astype(np.int16) + 12
+
+def midi_to_name(midi):
+    """Note name in the repo's spelling ("C#4"), or "pause" for PAUSE."""
+    if midi == PAUSE:
+        return "pause"
+    return NOTE_NAME_TABLE[midi - 12]
+
+def midi_octave(midi):
+    return midi // 12 - 1
+
+def empty_events(count=0):
+    return np.zeros(count, dtype=NOTE_EVENT_DTYPE)
+
+def events_to_info(events):
+    """Plain dicts for JSON output."""
+    return [{"note": midi_to_name(event["midi"]),
+             "midi": int(event["midi"]),
+             "onset": float(event["onset"]),
+             "duration": float(event["duration"])} for event in events]
+
+def events_from_played_notes(notes):
+    events = empty_events(len(notes))
+    for index, note in enumerate(notes):
+        events[index] = (note.midi, note.onset, note.duration)
+    return events
@@ -0,0 +1,84 @@
+import numpy as np
+from .note_events import PAUSE
+from .polyphony import midi_to_freq
+
+class OnsetRefiner:
+    """Second, fine-grained pass over the coarse FFT result, run only around note changes.
+
+    A change between two coarse events can really have happened anywhere in the
+    two frames either side of their boundary. Only that stretch is re-analysed
+    with short, overlapping windows, and the boundary moves to the first short
+    window where the new note (or silence) wins:
+
+    - note -> note: harmonic magnitude of the new note exceeds that of the old one
+    - pause -> note: energy first passes the gate
+    - note -> pause: energy last passes the gate
+    """
+    def __init__(self, fft, fine_window_seconds=0.05, fine_hop_seconds=0.01, harmonics=4):
+        self.fft = fft
+        self.fine_window_seconds = fine_window_seconds
+        self.fine_hop_seconds = fine_hop_seconds
+        self.harmonics = harmonics
+
+    def refine(self, audio, fs, events, start_seconds=0.0):
+        """Return a copy of the (monophonic) events with boundaries moved to the fine-grained changes.
+
+        audio[0] is the sample at start_seconds, for audio that is only part of a file.
+        """
+        if len(events) < 2:
+            return events.copy()
+
+        window_size = int(fs * self.fine_window_seconds)
+        hop_size = max(1, int(fs * self.fine_hop_seconds))
+        window = np.hamming(window_size)
+        coarse_seconds = self.fft.fft_window_seconds
+
+        boundaries = events["onset"].copy()
+        for index in range(1, len(events)):
+            previous_midi, next_midi = int(events["midi"][index - 1]), int(events["midi"][index])
+            boundary = boundaries[index]
+            begin = max(0, int((boundary - start_seconds - coarse_seconds) * fs))
+            end = min(len(audio), int((boundary - start_seconds + coarse_seconds) * fs))
+            if end - begin < window_size:
+                continue
+
+            region = audio[begin:end]
+            frames = np.lib.stride_tricks.sliding_window_view(region, window_size)[::hop_size]
+            centres = start_seconds + (begin + np.arange(len(frames)) * hop_size + window_size / 2) / fs
+            energies = np.sum(frames ** 2, axis=1) / window_size
+            loud = (energies >= self.fft.energy_threshold) & (energies >= 0.1 * energies.max())
+
+            if previous_midi == PAUSE:
+                changed = loud
+            elif next_midi == PAUSE:
+                changed = ~loud
+            else:
+                windowed = frames * window
+                changed = self.harmonic_strength(windowed, fs, next_midi) > \
+                    self.harmonic_strength(windowed, fs, previous_midi)
+
+            # The change is where the new state starts and then holds for the rest of the stretch
+            if not changed[-1]:
+                continue
+            held = np.flatnonzero(~changed)
+            first = held[-1] + 1 if len(held) else 0
+            boundaries[index] = np.clip(centres[first], boundaries[index - 1] + self.fine_hop_seconds,
+                                        boundary + coarse_seconds)
+
+        refined = events.copy()
+        refined["onset"] = boundaries
+        ends = np.append(boundaries[1:], events["onset"][-1] + events["duration"][-1])
+        refined["duration"] = ends - boundaries
+        return refined
+
+    def harmonic_strength(self, windowed_frames, fs, midi):
+        """Summed DFT magnitude of each frame at the note's first few harmonics.
+
+        The DFT is evaluated directly at the exact harmonic frequencies, which for a
+        handful of frequencies is much cheaper than a full FFT per short window.
+        """
+        frequencies = midi_to_freq(midi) * np.arange(1, self.harmonics + 1)
+        frequencies = frequencies[frequencies < fs / 2]
+        times = np.arange(windowed_frames.shape[1]) / fs
+        basis = np.exp(-2j * np.pi * times[:, None] * frequencies[None, :])
+        return np.abs(windowed_frames @ basis).sum(axis=1)
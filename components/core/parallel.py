@@ -0,0 +1,67 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .fft import TranscriptionCancelled
+from .streaming import WavStream
+
+def segment_decisions(fft, file_path, start_frame, end_frame, scale_by=None):
+    """Worker side: per-frame decisions for frames [start_frame, end_frame) of a file, and the trace."""
+    fft.tracer.reset()
+    stream = WavStream(file_path)
+    current_notes = fft.range_decisions(stream.fs, stream.data, start_frame, end_frame, scale_by)[0]
+    return current_notes, fft.tracer.to_dict()
+
+class SegmentedTranscriber:
+    """Transcribes a single long WAV file as consecutive segments in parallel worker processes.
+
+    Each worker memory-maps the file and runs FFT.range_decisions on its
+    segment, which brings its own filter padding and rolling-energy warm-up.
+    The per-frame decisions are then joined in order and merged into notes
+    once, so runs that cross a segment boundary come out as one note, exactly
+    as in a sequential pass.
+    """
+    def __init__(self, fft, workers=None, segment_seconds=120.0):
+        if fft.refine_onsets:
+            raise ValueError("onset refinement needs the whole filtered signal; transcribe sequentially instead")
+        self.fft = fft
+        self.workers = workers or os.cpu_count()
+        self.segment_seconds = segment_seconds
+
+    def segments(self, total_frames):
+        """(start_frame, end_frame) of each segment: at least one per worker, at most segment_seconds long."""
+        frames_per_segment = max(1, int(self.segment_seconds / self.fft.fft_window_seconds))
+        count = max(min(self.workers, total_frames), math.ceil(total_frames / frames_per_segment))
+        bounds = np.linspace(0, total_frames, count + 1).round().astype(int)
+        return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+    def transcribe(self, file_path, normalize=False, progress=None, cancel_event=None):
+        """Note events for the whole file, as FFT.transcribe_file would return them."""
+        stream = WavStream(file_path, normalize=normalize)
+        self.fft.tracer.count("samples", len(stream))
+        total_frames = self.fft.frame_range(stream.fs, len(stream))[1]
+        segments = self.segments(total_frames)
+        worker_fft = self.fft.worker_copy()
+
+        decisions = []
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(segments)) or 1) as executor:
+            futures = [executor.submit(segment_decisions, worker_fft, file_path, start_frame, end_frame,
+                                       stream.scale_by) for start_frame, end_frame in segments]
+            try:
+                for future, (start_frame, end_frame) in zip(futures, segments):
+                    current_notes, trace = future.result()
+                    decisions.append(current_notes)
+                    self.fft.tracer.merge(trace)
+                    self.fft.report_progress(progress, cancel_event, end_frame, total_frames)
+            except TranscriptionCancelled:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        if decisions:
+            current_notes = np.concatenate(decisions)
+        elif self.fft.polyphonic:
+            current_notes = np.zeros((0, 88), dtype=bool)
+        else:
+            current_notes = np.zeros(0, dtype=np.int16)
+        return self.fft.finish_notes(current_notes, None, stream.fs)
@@ -0,0 +1,84 @@
+import functools
+import numpy as np
+
+# The 88 piano keys, A0 (27.5 Hz) to C8 (4186 Hz)
+KEY_MIDI = np.arange(21, 109)
+
+def midi_to_freq(midi):
+    return 440.0 * 2.0 ** ((midi - 69) / 12)
+
+class TemplateIndex:
+    """Harmonic spectral templates of the 88 piano keys over one plan's rfft bins.
+
+    Each template puts weight 1/h on harmonic h (split linearly between the
+    two nearest bins) and is L2-normalised, so scoring a block of spectra is
+    a single matrix product giving the cosine similarity of every frame with
+    every key. Keys whose fundamental lies above the Nyquist frequency have no
+    template; they score -inf and are never detected.
+    """
+    def __init__(self, xf, harmonics=6):
+        self.xf = xf
+        self.key_freqs = midi_to_freq(KEY_MIDI)
+        bin_width = xf[1] - xf[0]
+
+        templates = np.zeros((len(KEY_MIDI), len(xf)))
+        keys = np.arange(len(KEY_MIDI))
+        for harmonic in range(1, harmonics + 1):
+            position = self.key_freqs * harmonic / bin_width
+            lower = np.floor(position).astype(int)
+            inside = lower + 1 < len(xf)
+            fraction = position - lower
+            np.add.at(templates, (keys[inside], lower[inside]), (1 - fraction[inside]) / harmonic)
+            np.add.at(templates, (keys[inside], lower[inside] + 1), fraction[inside] / harmonic)
+        norms = np.linalg.norm(templates, axis=1, keepdims=True)
+        self.playable = norms[:, 0] > 0
+        norms[~self.playable] = 1
+        self.templates = templates / norms
+
+        # Bins nearest each key's fundamental, used to check it is really sounding
+        self.fundamental_bins = np.clip(np.rint(self.key_freqs / bin_width).astype(int), 0, len(xf) - 1)
+
+    def score(self, magnitudes):
+        """Cosine similarity of every frame (row) with every key template."""
+        norms = np.linalg.norm(magnitudes, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        scores = (magnitudes / norms) @ self.templates.T
+        scores[:, ~self.playable] = -np.inf
+        return scores
+
+    def detect(self, magnitudes, max_notes=4, min_score=0.3, relative_score=0.6, min_fundamental=0.1):
+        """Boolean piano roll (frames x 88) of the keys judged to be sounding.
+
+        A key is kept when its score is a local maximum across keys, within
+        relative_score of the frame's best score, and its own fundamental bin
+        holds at least min_fundamental of the frame's peak magnitude (which rules
+        out the sub-octaves that share most of a played note's harmonics). At
+        most max_notes keys are kept per frame, best scores first.
+        """
+        scores = self.score(magnitudes)
+        best = scores.max(axis=1, keepdims=True)
+
+        padded = np.pad(scores, ((0, 0), (1, 1)), constant_values=-np.inf)
+        local_max = (scores >= padded[:, :-2]) & (scores >= padded[:, 2:])
+
+        peak = magnitudes.max(axis=1, keepdims=True)
+        peak[peak == 0] = 1
+        fundamental = magnitudes[:, self.fundamental_bins] / peak
+
+        active = local_max & (scores >= min_score) & (scores >= relative_score * best)
+        active &= fundamental >= min_fundamental
+
+        # Drop a key an octave above a stronger active key: it is usually just that key's 2nd harmonic
+        octave_below = np.zeros_like(active)
+        octave_below[:, 12:] = active[:, :-12] & (scores[:, :-12] >= scores[:, 12:])
+        active &= ~octave_below
+
+        if max_notes < len(KEY_MIDI):
+            ranked = np.where(active, scores, -np.inf)
+            cutoff = -np.sort(-ranked, axis=1)[:, max_notes - 1:max_notes]
+            active &= ranked >= cutoff
+        return active
+
+@functools.lru_cache(maxsize=16)
+def get_template_index(plan):
+    return TemplateIndex(plan.xf)
@@ -0,0 +1,84 @@
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from .lilypond_convert import lilypond_executable
+
+class LilyPondRenderError(Exception):
+    pass
+
+def report_render(future):
+    """Done-callback that reports a finished render the way run_lilypond does."""
+    try:
+        print(f"PDF successfully created: {future.result()}")
+    except Exception as e:
+        print(f"An error occurred: {e}")
+
+class LilyPondRenderQueue:
+    """Renders .ly files to PDF in background threads.
+
+    submit() returns immediately with a Future that resolves to the PDF path.
+    Files that pile up while the workers are busy are rendered together in a
+    single LilyPond invocation (up to max_batch per call), so they share one
+    LilyPond start-up.
+    """
+    def __init__(self, max_workers=2, max_batch=8, lilypond_path=None):
+        self.max_batch = max_batch
+        self.lilypond_path = lilypond_path
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="lilypond")
+        self.pending = []
+        self.lock = threading.Lock()
+
+    def submit(self, file_name, callback=None):
+        """Queue file_name for rendering; callback, if given, is called with the Future when it is done."""
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+        with self.lock:
+            self.pending.append((file_name, future))
+        self.executor.submit(self._render_pending)
+        return future
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def _render_pending(self):
+        with self.lock:
+            batch = self.pending[:self.max_batch]
+            del self.pending[:self.max_batch]
+        if not batch:
+            return
+
+        by_directory = {}
+        for file_name, future in batch:
+            if future.set_running_or_notify_cancel():
+                by_directory.setdefault(os.path.dirname(os.path.abspath(file_name)), []).append((file_name, future))
+        for output_dir, jobs in by_directory.items():
+            self._render_batch(output_dir, jobs)
+
+    def _render_batch(self, output_dir, jobs):
+        started = time.time()
+        lilypond_path = self.lilypond_path or lilypond_executable()
+        command = [lilypond_path, "--output=" + output_dir] + [file_name for file_name, _ in jobs]
+        try:
+            completed = subprocess.run(command, capture_output=True, text=True)
+        except OSError as e:
+            for _, future in jobs:
+                future.set_exception(e)
+            return
+
+        # LilyPond keeps going after a file fails, so judge every file by its own PDF
+        for file_name, future in jobs:
+            pdf_path = os.path.join(output_dir, os.path.splitext(os.path.basename(file_name))[0] + ".pdf")
+            if os.path.exists(pdf_path) and os.path.getmtime(pdf_path) >= started - 1:
+                future.set_result(pdf_path)
+            else:
+                future.set_exception(LilyPondRenderError(
+                    f"LilyPond failed on {file_name} (exit code {completed.returncode}): {completed.stderr.strip()}"))
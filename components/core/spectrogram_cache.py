@@ -0,0 +1,60 @@
+import hashlib
+import os
+import shutil
+import numpy as np
+
+class SpectrogramCache:
+    """Filtered-signal spectrograms and frame energies kept on disk as .npy files.
+
+    Entries are keyed by a hash of the audio samples and of every setting that
+    changes the DSP (sample rate, window, filter, decimation, dtype), but not of the
+    decision thresholds, so re-running the note decisions with new thresholds
+    reuses them. Cached arrays are opened with mmap_mode='r', so only the frames
+    that are actually looked at get read from disk.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, data, fs, settings):
+        """Hex digest identifying these samples analysed with these DSP settings."""
+        digest = hashlib.sha256()
+        data = np.ascontiguousarray(data)
+        digest.update(f"{data.dtype.str}{data.shape}{fs}{sorted(settings.items())}".encode())
+        digest.update(memoryview(data).cast("B"))
+        return digest.hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key)
+
+    def load(self, key):
+        """(magnitudes, energies) memory-mapped from disk, or None if the entry does not exist."""
+        path = self.entry_path(key)
+        try:
+            magnitudes = np.load(os.path.join(path, "magnitudes.npy"), mmap_mode="r")
+            energies = np.load(os.path.join(path, "energies.npy"), mmap_mode="r")
+        except FileNotFoundError:
+            return None
+        return magnitudes, energies
+
+    def create(self, key, total_frames, bins, dtype=np.float64):
+        """Writable memory maps for a new entry; call commit(key) once they are filled in."""
+        path = self.entry_path(key) + f".tmp-{os.getpid()}"
+        os.makedirs(path, exist_ok=True)
+        magnitudes = np.lib.format.open_memmap(os.path.join(path, "magnitudes.npy"), mode="w+",
+                                               dtype=dtype, shape=(total_frames, bins))
+        energies = np.lib.format.open_memmap(os.path.join(path, "energies.npy"), mode="w+",
+                                             dtype=np.float64, shape=(total_frames,))
+        return magnitudes, energies
+
+    def commit(self, key):
+        """Publish an entry started with create(); a concurrent writer of the same entry may win instead."""
+        temporary = self.entry_path(key) + f".tmp-{os.getpid()}"
+        try:
+            os.rename(temporary, self.entry_path(key))
+        except OSError:
+            shutil.rmtree(temporary, ignore_errors=True)
+
+    def discard(self, key):
+        """Remove an unfinished entry started with create()."""
+        shutil.rmtree(self.entry_path(key) + f".tmp-{os.getpid()}", ignore_errors=True)
@@ -0,0 +1,120 @@
+import numpy as np
+
+class StreamingHighPass:
+    """Causal version of FFT.high_pass_filter that keeps the filter state between blocks."""
+    def __init__(self, sos):
+        self.sos = sos
+        self.zi = np.zeros((sos.shape[0], 2))
+
+    def process(self, block):
+        import scipy.signal
+        filtered, self.zi = scipy.signal.sosfilt(self.sos, block, zi=self.zi)
+        return filtered
+
+def blockwise_sosfiltfilt(sos, x, dtype=np.float32, block_size=1 << 16, progress=None):
+    """scipy.signal.sosfiltfilt computed block by block, keeping only the samples in dtype.
+
+    The filter state stays float64: a high-order high-pass with a cutoff far
+    below fs has poles so close to the unit circle that float32 arithmetic in
+    the recursion leaves a loud artefact near the cutoff frequency. Only the
+    signal between the two passes and the result are rounded to dtype, and no
+    float64 copy of the whole signal is made. With dtype float64 the result
+    equals sosfiltfilt's exactly.
+
+    progress, if given, is called as progress(samples_done, 2 * len(x)) after
+    every block of either pass; an exception it raises stops the filter.
+    """
+    import scipy.signal
+    ntaps = 2 * len(sos) + 1 - min((sos[:, 2] == 0).sum(), (sos[:, 5] == 0).sum())
+    edge = 3 * ntaps
+    if len(x) <= edge:
+        raise ValueError(f"The length of the input vector x must be greater than padlen, which is {edge}.")
+    zi = scipy.signal.sosfilt_zi(sos)
+
+    # Odd extension of both ends, as in sosfiltfilt's default padding
+    head = 2.0 * x[0] - np.asarray(x[edge:0:-1], dtype=float)
+    tail = 2.0 * x[-1] - np.asarray(x[-2:-(edge + 2):-1], dtype=float)
+    y = np.empty(len(x) + 2 * edge, dtype=dtype)
+
+    forward, state = scipy.signal.sosfilt(sos, head, zi=zi * head[0])
+    y[:edge] = forward
+    for begin in range(0, len(x), block_size):
+        block = np.asarray(x[begin:begin + block_size], dtype=float)
+        y[edge + begin:edge + begin + len(block)], state = scipy.signal.sosfilt(sos, block, zi=state)
+        if progress is not None:
+            progress(begin + len(block), 2 * len(x))
+    forward, state = scipy.signal.sosfilt(sos, tail, zi=state)
+    y[-edge:] = forward
+
+    # Backward pass in place, from the (unrounded) last forward sample
+    state = zi * forward[-1]
+    for end in range(len(y), 0, -block_size):
+        begin = max(0, end - block_size)
+        backward, state = scipy.signal.sosfilt(sos, np.asarray(y[begin:end][::-1], dtype=float), zi=state)
+        y[begin:end] = backward[::-1]
+        if progress is not None:
+            progress(len(x) + min(len(x), len(y) - begin - edge), 2 * len(x))
+    return y[edge:-edge]
+
+class WavStream:
+    """Reads a WAV file through a memory map and hands it out in fixed-size blocks.
+
+    Only one block is converted to floating point at a time, so memory use
+    does not grow with the length of the recording.
+    """
+    def __init__(self, file_path, normalize=False):
+        self.file_path = file_path
+        import scipy.io.wavfile as wavfile
+        self.fs, self.data = wavfile.read(file_path, mmap=True)
+        self.scale_by = None
+        if normalize:
+            self.scale_by = self.peak()
+
+    def __len__(self):
+        return len(self.data)
+
+    def channel(self, begin, end):
+        if len(self.data.shape) == 1:
+            return self.data[begin:end]
+        return self.data[begin:end, 0]
+
+    def peak(self, block_size=1 << 20):
+        """Largest-magnitude sample over all channels, matching microphone_data_preparation."""
+        data_min, data_max = None, None
+        for begin in range(0, len(self.data), block_size):
+            block = self.data[begin:begin + block_size]
+            block_min, block_max = block.min(), block.max()
+            data_min = block_min if data_min is None else min(data_min, block_min)
+            data_max = block_max if data_max is None else max(data_max, block_max)
+        if np.abs(data_min) > np.abs(data_max):
+            return data_min
+        return data_max
+
+    def blocks(self, block_size, dtype=np.float64):
+        dtype = np.dtype(dtype)
+        for begin in range(0, len(self.data), block_size):
+            block = self.channel(begin, begin + block_size)
+            if self.scale_by is not None:
+                if dtype == np.float32:
+                    block = block / np.float32(self.scale_by) * np.float32(32767)
+                else:
+                    block = (block / self.scale_by) * 32767
+            yield np.asarray(block, dtype=dtype)
+
+    def frames(self, frame_size, sos, frames_per_block=256, dtype=np.float64):
+        """Yield high-pass filtered frames of frame_size samples in dtype, zero-padding the last one.
+
+        The filter state stays float64 whatever dtype is (see blockwise_sosfiltfilt).
+        """
+        high_pass = StreamingHighPass(sos)
+        pending = np.empty(0, dtype=dtype)
+        for block in self.blocks(frame_size * frames_per_block, dtype):
+            filtered = high_pass.process(block).astype(dtype, copy=False)
+            if len(pending):
+                filtered = np.concatenate([pending, filtered])
+            full_frames = len(filtered) // frame_size
+            for frame_number in range(full_frames):
+                yield filtered[frame_number * frame_size:(frame_number + 1) * frame_size]
+            pending = filtered[full_frames * frame_size:]
+        if len(pending):
+            yield np.concatenate([pending, np.zeros(frame_size - len(pending), dtype=dtype)])
@@ -0,0 +1,61 @@
+import json
+import time
+from contextlib import contextmanager
+
+class Tracer:
+    """Collects per-stage timings and counters for one or more transcriptions.
+
+    Per-frame debug records are only kept when debug_frames is enabled, since
+    long files produce one record for every frame.
+    """
+    def __init__(self, debug_frames=False):
+        self.debug_frames = debug_frames
+        self.reset()
+
+    def reset(self):
+        self.timings = {}
+        self.calls = {}
+        self.counters = {}
+        self.frame_records = []
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block of code; repeated entries into the same stage are summed."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def merge(self, report):
+        """Add the timings, calls, counters and frame records of another tracer's to_dict() report."""
+        for name, seconds in report["timings"].items():
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+        for name, calls in report["calls"].items():
+            self.calls[name] = self.calls.get(name, 0) + calls
+        for name, amount in report["counters"].items():
+            self.count(name, amount)
+        if self.debug_frames:
+            self.frame_records.extend(report.get("frames", []))
+
+    def frame(self, frame_number, **fields):
+        if self.debug_frames:
+            self.frame_records.append(dict(frame=frame_number, **fields))
+
+    def to_dict(self):
+        report = {"timings": dict(self.timings), "calls": dict(self.calls), "counters": dict(self.counters)}
+        if self.debug_frames:
+            report["frames"] = list(self.frame_records)
+        return report
+
+    def to_json(self, file_name=None):
+        """Return the report as a JSON string, also writing it to file_name if given."""
+        report = json.dumps(self.to_dict(), indent=2, default=float)
+        if file_name is not None:
+            with open(file_name, 'w') as file:
+                file.write(report)
+        return report
@@ -1,6 +1,7 @@
 import customtkinter as ctk
 from .microphone_handler import MicrophoneHandler
 from .music_file_handler import MusicFileHandler
+from .core.render_queue import LilyPondRenderQueue
 
 class OptionsPageContent(ctk.CTkFrame):
     """Frame containing options for either selecting a music file or recording with a microphone."""
@@ -8,11 +9,15 @@ class OptionsPageContent(ctk.CTkFrame):
         super().__init__(master, *args, **kwargs)
         self.controller = controller
 
-        self.microphone_handler = MicrophoneHandler()
-        self.music_file_handler = MusicFileHandler()
+        # PDFs are rendered in the background so processing returns once the .ly file is written
+        self.render_queue = LilyPondRenderQueue()
+        self.microphone_handler = MicrophoneHandler(render_queue=self.render_queue)
+        self.music_file_handler = MusicFileHandler(render_queue=self.render_queue)
 
         self.chosen_file = ctk.StringVar()
         self.recorded_file_path = ""
+        self.file_job = None
+        self.recording_job = None
 
         # Fonts
         self.tab_font_style = ctk.CTkFont(size=25)
@@ -115,9 +120,36 @@ class OptionsPageContent(ctk.CTkFrame):
             self.process_button.configure(state="normal")
 
     def process_chosen_file(self):
-        """Process the selected WAV file and update the status."""
-        success = self.music_file_handler.process_file()
-        if success:
+        """Start processing the selected WAV file in the background and turn the button into Cancel."""
+        self.file_job = self.music_file_handler.process_file()
+        if self.file_job is not None:
+            self.process_button.configure(text="Cancel", command=self.cancel_file_processing)
+            self.file_button.configure(state="disabled")
+            self.after(100, self.poll_file_job)
+
+    def cancel_file_processing(self):
+        if self.file_job is not None:
+            self.file_job.cancel()
+            self.process_button.configure(state="disabled")
+
+    def poll_file_job(self):
+        """Update the progress of the file job and handle its outcome once it is finished."""
+        job = self.file_job
+        if not job.done():
+            self.status_message_label.configure(text=f"Processing... {job.fraction:.0%}")
+            self.after(100, self.poll_file_job)
+            return
+
+        self.file_job = None
+        self.process_button.configure(text="Start process", command=self.process_chosen_file)
+        self.file_button.configure(state="normal")
+        if job.cancelled():
+            self.status_message_label.configure(text="Processing cancelled.")
+            self.process_button.configure(state="normal")
+        elif job.error() is not None:
+            self.status_message_label.configure(text=f"Processing failed: {job.error()}")
+            self.process_button.configure(state="normal")
+        else:
             self.status_message_label.configure(text="File processed successfully!")
             self.chosen_file.set("")
             self.chosen_file_name.configure(text="")
@@ -130,6 +162,18 @@ class OptionsPageContent(ctk.CTkFrame):
         self.mic_tab_stop_button.configure(state="normal")
         self.mic_tab_process_button.configure(state="disabled")
         self.mic_tab_label.configure(text="Recording... Click Stop to save")
+        self.after(100, self.poll_live_notes)
+
+    def poll_live_notes(self):
+        """Show the most recent note detected while recording, then check again shortly."""
+        if self.microphone_handler.running is None:
+            return
+        latest_note = None
+        while not self.microphone_handler.live_notes.empty():
+            latest_note = self.microphone_handler.live_notes.get_nowait()
+        if latest_note is not None and latest_note.note != "pause":
+            self.mic_tab_label.configure(text=f"Recording... Now playing: {latest_note.note}")
+        self.after(100, self.poll_live_notes)
 
     def stop_recording(self):
         """Stop recording, enable the process button, and update UI states."""
@@ -141,8 +185,35 @@ class OptionsPageContent(ctk.CTkFrame):
         self.mic_tab_label.configure(text="Recording stopped. Click Process to make it into a sheet!")
 
     def process_recording(self):
-        """Process the recorded audio and update the UI status."""
-        success = self.microphone_handler.process_recording()
-        if success:
+        """Start processing the recorded audio in the background and turn the button into Cancel."""
+        self.recording_job = self.microphone_handler.process_recording()
+        if self.recording_job is not None:
+            self.mic_tab_process_button.configure(text="Cancel", command=self.cancel_recording_processing)
+            self.mic_tab_start_button.configure(state="disabled")
+            self.after(100, self.poll_recording_job)
+
+    def cancel_recording_processing(self):
+        if self.recording_job is not None:
+            self.recording_job.cancel()
+            self.mic_tab_process_button.configure(state="disabled")
+
+    def poll_recording_job(self):
+        """Update the progress of the recording job and handle its outcome once it is finished."""
+        job = self.recording_job
+        if not job.done():
+            self.mic_tab_label.configure(text=f"Processing... {job.fraction:.0%}")
+            self.after(100, self.poll_recording_job)
+            return
+
+        self.recording_job = None
+        self.mic_tab_process_button.configure(text="Process File", command=self.process_recording)
+        self.mic_tab_start_button.configure(state="normal")
+        if job.cancelled():
+            self.mic_tab_label.configure(text="Processing cancelled.")
+            self.mic_tab_process_button.configure(state="normal")
+        elif job.error() is not None:
+            self.mic_tab_label.configure(text=f"Processing failed: {job.error()}")
+            self.mic_tab_process_button.configure(state="normal")
+        else:
             self.mic_tab_label.configure(text="Recording processed successfully!")
             self.mic_tab_process_button.configure(state="disabled")
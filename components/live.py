@@ -0,0 +1,69 @@
+import threading
+import numpy as np
+from .core.fft import FFT, StreamingDetector
+from .ring_buffer import RingBuffer
+from .core.streaming import StreamingHighPass
+
+class LiveTranscriber:
+    """Detects notes while recording, from the PCM buffers handed to the PyAudio callback.
+
+    feed() only copies the buffer into a ring buffer; a worker thread runs the
+    FFT note logic on every full window and calls on_note with each new
+    PlayedNote. The duration of the latest note keeps growing while it is held.
+    """
+    def __init__(self, rate, channels=1, fft=None, on_note=None, buffer_seconds=5.0):
+        self.rate = rate
+        self.channels = channels
+        self.fft = fft if fft is not None else FFT()
+        self.on_note = on_note
+        self.window_size = self.fft.plan(rate).window_size
+        self.buffer = RingBuffer(int(rate * buffer_seconds))
+        self.high_pass = StreamingHighPass(self.fft.high_pass_sos(rate))
+        self.detector = StreamingDetector(self.fft, rate)
+        self.data_ready = threading.Event()
+        self.running = False
+        self.worker = None
+
+    @property
+    def notes(self):
+        return self.detector.notes
+
+    def start(self):
+        self.running = True
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+        return self
+
+    def stop(self):
+        """Stop the worker after it has analysed every complete window already buffered."""
+        self.running = False
+        self.data_ready.set()
+        if self.worker is not None:
+            self.worker.join()
+            self.worker = None
+        return self.notes
+
+    def feed(self, in_data):
+        samples = np.frombuffer(in_data, dtype=np.int16)
+        if self.channels > 1:
+            samples = samples[::self.channels]
+        self.buffer.write(samples)
+        self.data_ready.set()
+
+    def process_pending(self):
+        while True:
+            samples = self.buffer.read(self.window_size)
+            if samples is None:
+                return
+            frame = self.high_pass.process(samples.astype(float))
+            last_note = self.notes[-1] if self.notes else None
+            note = self.detector.push(frame)
+            if note is not last_note and self.on_note is not None:
+                self.on_note(note)
+
+    def _run(self):
+        while self.running:
+            self.data_ready.wait()
+            self.data_ready.clear()
+            self.process_pending()
+        self.process_pending()
@@ -1,28 +1,40 @@
 import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from CTkMessagebox import CTkMessagebox
 from customtkinter  import filedialog
 from .recorder import Recorder
-from .fft import FFT
+from .core.fft import FFT
+from .live import LiveTranscriber
+from .background_job import BackgroundJob
 
 class MicrophoneHandler:
-    def __init__(self):
+    def __init__(self, render_queue=None):
         self.rec = Recorder()
         self.running = None
-        self.fft = FFT()
+        self.fft = FFT(render_queue=render_queue)
         self.recorded_file_path = ""
+        self.live_transcriber = None
+        self.live_notes = queue.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1)
 
     def start_recording(self):
         if self.running is not None:
             CTkMessagebox.showinfo("Error", "Already recording.")
         else:
-            self.running = self.rec.open('instrument_recording.wav', 'wb')
+            self.live_transcriber = LiveTranscriber(self.rec.rate, self.rec.channels, on_note=self.live_notes.put).start()
+            self.running = self.rec.open('instrument_recording.wav', 'wb', listener=self.live_transcriber)
             self.running.start_recording()
 
     def stop_recording(self):
         if self.running is not None:
             self.recorded_file_path = self.running.stop_recording()
             self.running.wavefile.close()
+            stats = self.running.stats()
+            if stats["input_overflows"] or stats["dropped_samples"]:
+                print(f"Audio was lost while recording: {stats}")
             self.running = None 
+            self.live_transcriber.stop()
             print(f"Recorded file path: {self.recorded_file_path}")
 
             save_path = filedialog.asksaveasfilename(defaultextension=".wav",
@@ -47,8 +59,8 @@ class MicrophoneHandler:
             CTkMessagebox(title="Error", message="You are not recording.", icon="cancel")  
 
     def process_recording(self):
+        """Start processing the recording in the background; returns the BackgroundJob, or None."""
         if self.recorded_file_path and os.path.exists(self.recorded_file_path):
-            self.fft.microphone_data_preparation(self.recorded_file_path)
-            return True
+            return BackgroundJob(self.executor, self.fft.microphone_data_preparation, self.recorded_file_path)
         CTkMessagebox(title="Error", message="No recording found to process.", icon="cancel")
-        return False
+        return None
@@ -1,10 +1,13 @@
+from concurrent.futures import ThreadPoolExecutor
 from customtkinter  import filedialog
-from.fft import FFT
+from .core.fft import FFT
+from .background_job import BackgroundJob
 
 class MusicFileHandler:
-    def __init__(self):
-        self.fft = FFT()
+    def __init__(self, render_queue=None):
+        self.fft = FFT(render_queue=render_queue)
         self.chosen_file = ""
+        self.executor = ThreadPoolExecutor(max_workers=1)
 
     def choose_file(self):
         self.chosen_file = filedialog.askopenfilename(filetypes=[("wav files", "*.wav")])
@@ -14,7 +17,7 @@ class MusicFileHandler:
         return False
 
     def process_file(self):
+        """Start processing the chosen file in the background; returns the BackgroundJob, or None."""
         if self.chosen_file:
-            self.fft.music_file_data_preparation(self.chosen_file)
-            return True
-        return False
+            return BackgroundJob(self.executor, self.fft.music_file_data_preparation, self.chosen_file)
+        return None
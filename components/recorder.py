@@ -1,13 +1,19 @@
-import pyaudio
+import threading
 import wave
-import matplotlib.pyplot as plt
 import numpy as np
+from .ring_buffer import RingBuffer
 
 #Global Variables
 FPB = 3200 #Frames per Buffer: number of data points processed (recorder and captured) in each buffer (second)
 CHANNELS = 1 #Number of channels in the audio file (1 for mono, 2 for stereo)
 RATE = 44100 #Sample rate of the audio file in Hz (44.1 kHz) or samples per second
-FORMAT = pyaudio.paInt16 #Format of the audio file (16-bit signed integer) or bytes per sample (2 bytes per sample)
+#PortAudio constants, spelled out so that importing this module does not load PyAudio
+PA_INT16 = 8
+PA_CONTINUE = 0
+PA_INPUT_UNDERFLOW = 1
+PA_INPUT_OVERFLOW = 2
+FORMAT = PA_INT16 #Format of the audio file (16-bit signed integer) or bytes per sample (2 bytes per sample)
+BUFFER_SECONDS = 10 #How much audio the ring buffer between the callback and the writer thread can hold
 
 
 class Recorder(object):
@@ -17,22 +23,45 @@ class Recorder(object):
         self.rate = rate
         self.frames_per_buffer = frames_per_buffer
 
-    def open(self, fname, mode='wb'):
+    def open(self, fname, mode='wb', listener=None, audio=None):
         return RecordingFile(fname, mode, self.channels, self.rate,
-                            self.frames_per_buffer)
+                            self.frames_per_buffer, listener, audio)
 class RecordingFile(object):
+    """Records from the default input into a WAV file.
+
+    The PortAudio callback only copies each buffer into a preallocated ring
+    buffer; a separate writer thread moves the audio to disk, so slow disk I/O
+    never blocks the real-time audio thread. audio can replace pyaudio.PyAudio,
+    e.g. with the fake one in benchmarks/check_recorder.py.
+    """
     def __init__(self, fname, mode, channels, 
-                rate, frames_per_buffer):
+                rate, frames_per_buffer, listener=None, audio=None):
         self.fname = fname
         self.mode = mode
         self.channels = channels
         self.rate = rate
         self.frames_per_buffer = frames_per_buffer
-        self.p = pyaudio.PyAudio()
+        self.listener = listener #Optional object with a feed(in_data) method, e.g. a LiveTranscriber
+        if audio is None:
+            import pyaudio # Imported on first recording, so the GUI starts without touching PortAudio
+            audio = pyaudio.PyAudio()
+        self.p = audio
         self.wavefile = self.prepare_file(self.fname, self.mode)
         self.stream = None
 
+        self.ring_buffer = RingBuffer(int(rate * BUFFER_SECONDS) * channels)
+        self.data_ready = threading.Event()
+        self.writer = None
+        self.writing = False
+        self.callbacks = 0
+        self.frames_written = 0
+        self.input_overflows = 0
+        self.input_underflows = 0
+
     def start_recording(self):
+        self.writing = True
+        self.writer = threading.Thread(target=self.write_pending, daemon=True)
+        self.writer.start()
         self.stream = self.p.open(format=FORMAT,
                                         channels=self.channels,
                                         rate=self.rate,
@@ -46,14 +75,50 @@ class RecordingFile(object):
         self.stream.stop_stream()
         self.stream.close()
         self.p.terminate()
+        self.writing = False
+        self.data_ready.set()
+        self.writer.join()
         return self.fname
 
     def get_callback(self):
         def callback(in_data, frame_count, time_info, status):
-            self.wavefile.writeframes(in_data)
-            return in_data, pyaudio.paContinue
+            self.callbacks += 1
+            if status & PA_INPUT_OVERFLOW:
+                self.input_overflows += 1
+            if status & PA_INPUT_UNDERFLOW:
+                self.input_underflows += 1
+            self.ring_buffer.write(np.frombuffer(in_data, dtype=np.int16))
+            self.data_ready.set()
+            if self.listener is not None:
+                self.listener.feed(in_data)
+            return in_data, PA_CONTINUE
         return callback
 
+    def write_pending(self):
+        """Writer thread: move buffered audio to the WAV file until recording stops, then flush."""
+        while self.writing:
+            self.data_ready.wait()
+            self.data_ready.clear()
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        samples = self.ring_buffer.read_available()
+        if len(samples):
+            self.wavefile.writeframes(samples.tobytes())
+            self.frames_written += len(samples) // self.channels
+
+    def stats(self):
+        """Callback, overflow and underflow counters of the recording so far."""
+        ring_stats = self.ring_buffer.stats()
+        return {"callbacks": self.callbacks,
+                "frames_written": self.frames_written,
+                "input_overflows": self.input_overflows,
+                "input_underflows": self.input_underflows,
+                "ring_overflows": ring_stats["overflows"],
+                "dropped_samples": ring_stats["dropped_samples"],
+                "buffered_samples": ring_stats["buffered"]}
+
 
     def prepare_file(self, fname, mode='wb'):
         wavefile = wave.open(fname, mode)
@@ -67,4 +132,3 @@ class RecordingFile(object):
         signal = wave_file.readframes(-1)
         signal = np.frombuffer(signal, dtype=np.int16)
         return signal
-
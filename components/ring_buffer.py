@@ -0,0 +1,64 @@
+import numpy as np
+
+class RingBuffer:
+    """Fixed-capacity sample buffer for one producer thread and one consumer thread.
+
+    The producer only moves write_position and the consumer only moves
+    read_position, so no lock is needed between the audio callback and the
+    thread reading from it.
+    """
+    def __init__(self, capacity, dtype=np.int16):
+        self.capacity = capacity
+        self.buffer = np.zeros(capacity, dtype=dtype)
+        self.write_position = 0
+        self.read_position = 0
+        # Only the producer updates these two, only the consumer updates underflows
+        self.overflows = 0
+        self.dropped_samples = 0
+        self.underflows = 0
+
+    @property
+    def available(self):
+        return self.write_position - self.read_position
+
+    @property
+    def free(self):
+        return self.capacity - self.available
+
+    def write(self, samples):
+        """Copy samples in, dropping whatever does not fit. Returns the number written."""
+        count = min(len(samples), self.free)
+        if count < len(samples):
+            self.overflows += 1
+            self.dropped_samples += len(samples) - count
+        start = self.write_position % self.capacity
+        first = min(count, self.capacity - start)
+        self.buffer[start:start + first] = samples[:first]
+        self.buffer[:count - first] = samples[first:count]
+        self.write_position += count
+        return count
+
+    def read(self, count):
+        """Return the next count samples as a new array, or None if fewer are buffered."""
+        if self.available < count:
+            self.underflows += 1
+            return None
+        start = self.read_position % self.capacity
+        first = min(count, self.capacity - start)
+        samples = np.concatenate([self.buffer[start:start + first], self.buffer[:count - first]])
+        self.read_position += count
+        return samples
+
+    def read_available(self):
+        """Return everything buffered so far as a new array (possibly empty)."""
+        count = self.available
+        if count == 0:
+            return self.buffer[:0].copy()
+        return self.read(count)
+
+    def stats(self):
+        return {"capacity": self.capacity,
+                "buffered": self.available,
+                "overflows": self.overflows,
+                "dropped_samples": self.dropped_samples,
+                "underflows": self.underflows}
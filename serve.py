@@ -0,0 +1,280 @@
+"""Local transcription service: a small HTTP server with warm worker processes.
+
+Example:
+    python serve.py --port 8765 --workers 4 --queue-size 16
+
+    curl --data-binary @samples/fur-elise-piano.wav "http://127.0.0.1:8765/transcribe?format=ly"
+    curl -d '{"path": "samples/fur-elise-piano.wav", "start": 3, "end": 9}' http://127.0.0.1:8765/transcribe
+    curl http://127.0.0.1:8765/metrics
+
+POST /transcribe takes either a WAV file as the request body or a JSON object
+with the "path" of a WAV file on this machine (plus optional "start" and
+"end" in seconds). Options go in the query string or the JSON object:
+format (json, ly or midi), microphone, polyphonic, decimate and
+refine_onsets. When every worker is busy and the queue is full, requests are
+turned away with 503 and a Retry-After header instead of piling up.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from components.core.fft import FFT
+from components.core.lilypond_convert import LilyPondConverter
+from components.core.midi_convert import MidiConverter
+from components.core.streaming import WavStream
+
+OUTPUT_TYPES = {"json": "application/json", "ly": "text/x-lilypond; charset=utf-8", "midi": "audio/midi"}
+FFT_OPTIONS = ("polyphonic", "decimate", "refine_onsets")
+WARM_SAMPLE_RATES = (44100, 48000)
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class InvalidAudio(ValueError):
+    """The uploaded or referenced file is not a readable WAV file (raised in the worker)."""
+
+
+def _warm_worker():
+    """Import SciPy and build the analysis plans for the common sample rates before the first job."""
+    fft = FFT()
+    for fs in WARM_SAMPLE_RATES:
+        fft.plan(fs)
+    import scipy.io.wavfile  # noqa: F401
+    import scipy.signal  # noqa: F401
+
+
+def run_job(source, output_format, microphone=False, start=None, end=None, **options):
+    """Transcribe one WAV (raw bytes or a path) in a worker process; returns (body, seconds of work)."""
+    started = time.perf_counter()
+    fft = FFT(**options)
+    try:
+        if isinstance(source, bytes) or (start is None and end is None):
+            fs, data = fft.load_audio(io.BytesIO(source) if isinstance(source, bytes) else source,
+                                      normalize=microphone)
+            scale_by = None
+        else:
+            # Only the requested range of a file on disk is read
+            stream = WavStream(source, normalize=microphone)
+            fs, data, scale_by = stream.fs, stream.data, stream.scale_by
+    except ValueError as e:
+        raise InvalidAudio(f"not a readable WAV file: {e}")
+
+    if start is None and end is None:
+        notes = fft.analyse(fs, data)
+    else:
+        notes = fft.analyse_range(fs, data, *fft.frame_range(fs, len(data), start or 0.0, end), scale_by)
+
+    if output_format == "ly":
+        body = LilyPondConverter(notes).document().encode()
+    elif output_format == "midi":
+        body = MidiConverter(notes).convert()
+    else:
+        body = json.dumps({"notes": fft.notes_to_info(notes)}).encode()
+    return body, time.perf_counter() - started
+
+
+class TranscriptionService:
+    """Warm worker processes behind a bounded job queue, with latency metrics."""
+    def __init__(self, workers=None, queue_size=16, latency_window=1000):
+        self.workers = workers or os.cpu_count()
+        self.queue_size = queue_size
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.latencies = deque(maxlen=latency_window)
+        self.waits = deque(maxlen=latency_window)
+        self.started = time.time()
+
+    def submit(self, source, output_format, microphone=False, start=None, end=None, **options):
+        """Run a job and wait for its result; raises RequestError(503) if the queue is full."""
+        with self.lock:
+            if self.in_flight >= self.workers + self.queue_size:
+                self.rejected += 1
+                raise RequestError(503, "transcription queue is full")
+            self.in_flight += 1
+        submitted = time.perf_counter()
+        try:
+            body, work_seconds = self.executor.submit(run_job, source, output_format, microphone, start, end,
+                                                      **options).result()
+        except InvalidAudio as e:
+            # The client's file, not the service, is at fault
+            with self.lock:
+                self.in_flight -= 1
+            raise RequestError(400, str(e))
+        except Exception:
+            with self.lock:
+                self.in_flight -= 1
+                self.failed += 1
+            raise
+        latency = time.perf_counter() - submitted
+        with self.lock:
+            self.in_flight -= 1
+            self.completed += 1
+            self.latencies.append(latency)
+            self.waits.append(max(0.0, latency - work_seconds))
+        return body
+
+    def metrics(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            waits = sorted(self.waits)
+            return {"workers": self.workers,
+                    "queue_size": self.queue_size,
+                    "in_flight": self.in_flight,
+                    "queue_depth": max(0, self.in_flight - self.workers),
+                    "completed": self.completed,
+                    "failed": self.failed,
+                    "rejected": self.rejected,
+                    "uptime_seconds": time.time() - self.started,
+                    "latency_seconds": percentiles(latencies),
+                    "queue_wait_seconds": percentiles(waits)}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+def percentiles(values):
+    """Mean, median, 95th percentile and maximum of sorted values (None when empty)."""
+    if not values:
+        return None
+    return {"mean": sum(values) / len(values),
+            "p50": values[len(values) // 2],
+            "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+            "max": values[-1]}
+
+
+def flag(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() in ("1", "true", "yes", "on")
+
+
+class TranscriptionHandler(BaseHTTPRequestHandler):
+    server_version = "MusicTranscribe/1.0"
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/metrics":
+            self.send_body(200, json.dumps(self.server.service.metrics(), indent=2).encode(), "application/json")
+        elif path == "/health":
+            self.send_body(200, b'{"status": "ok"}', "application/json")
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/transcribe":
+            self.send_error(404)
+            return
+        try:
+            source, options = self.read_request(url)
+            output_format = options.pop("format", "json")
+            if not isinstance(output_format, str) or output_format not in OUTPUT_TYPES:
+                raise RequestError(400, f"unknown format {output_format!r}")
+            body = self.server.service.submit(source, output_format, **options)
+        except RequestError as e:
+            headers = {"Retry-After": "1"} if e.status == 503 else {}
+            self.send_body(e.status, json.dumps({"error": str(e)}).encode(), "application/json", headers)
+            return
+        except Exception as e:
+            self.send_body(500, json.dumps({"error": str(e)}).encode(), "application/json")
+            return
+        self.send_body(200, body, OUTPUT_TYPES[output_format])
+
+    def read_request(self, url):
+        """(source, options) from the query string and a WAV or JSON body."""
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            raise RequestError(400, "empty request body")
+        if length > self.server.max_upload_bytes:
+            raise RequestError(413, "upload too large")
+        body = self.rfile.read(length)
+
+        fields = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if body[:4] == b"RIFF":
+            source = body
+        else:
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                payload = None
+            if not isinstance(payload, dict):
+                raise RequestError(400, "body must be a WAV file or a JSON object")
+            fields.update(payload)
+            source = fields.pop("path", None)
+            if not isinstance(source, str) or not os.path.isfile(source):
+                raise RequestError(400, "JSON requests need the \"path\" of an existing WAV file")
+
+        options = {"format": fields.get("format", "json"), "microphone": flag(fields.get("microphone", False))}
+        for name in ("start", "end"):
+            if fields.get(name) is not None:
+                try:
+                    options[name] = float(fields[name])
+                except (TypeError, ValueError):
+                    raise RequestError(400, f"{name} must be a number of seconds")
+        for name in FFT_OPTIONS:
+            if name in fields:
+                options[name] = flag(fields[name])
+        if options.get("polyphonic") and options.get("refine_onsets"):
+            raise RequestError(400, "refine_onsets cannot be combined with polyphonic")
+        return source, options
+
+    def send_body(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve transcriptions over HTTP from warm worker processes.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: localhost only)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--queue-size", type=int, default=16,
+                        help="jobs that may wait for a free worker before requests get 503")
+    parser.add_argument("--max-upload-mb", type=float, default=512, help="largest accepted WAV upload")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    service = TranscriptionService(workers=args.workers, queue_size=args.queue_size)
+    server = ThreadingHTTPServer((args.host, args.port), TranscriptionHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.max_upload_bytes = int(args.max_upload_mb * 1024 * 1024)
+    server.verbose = args.verbose
+    print(f"Serving transcriptions on http://{args.host}:{server.server_address[1]} with {service.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
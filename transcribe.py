@@ -0,0 +1,220 @@
+"""Command-line batch transcription without the GUI.
+
+Example:
+    python transcribe.py samples/ --workers 4 --output-dir out
+"""
+import argparse
+import contextlib
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from components.core.fft import FFT
+from components.core.parallel import SegmentedTranscriber
+from components.core.render_queue import LilyPondRenderQueue
+from components.core.spectrogram_cache import SpectrogramCache
+from components.core.streaming import WavStream
+from components.core.tracing import Tracer
+
+_worker_fft = None
+
+
+def _init_worker(debug_frames=False, polyphonic=False, refine_onsets=False, decimate=False, cache_dir=None,
+                 float32=False, fft_window_seconds=0.20, interpolate_peaks=False):
+    global _worker_fft
+    cache = SpectrogramCache(cache_dir) if cache_dir is not None else None
+    _worker_fft = FFT(fft_window_seconds=fft_window_seconds, tracer=Tracer(debug_frames=debug_frames),
+                      polyphonic=polyphonic, refine_onsets=refine_onsets, decimate=decimate, cache=cache,
+                      dtype=np.float32 if float32 else np.float64, interpolate_peaks=interpolate_peaks)
+
+
+def expand_inputs(inputs):
+    """Turn a list of files, directories and glob patterns into a sorted list of WAV files."""
+    files = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            files.update(glob.glob(os.path.join(item, "**", "*.wav"), recursive=True))
+        elif glob.has_magic(item):
+            files.update(glob.glob(item, recursive=True))
+        else:
+            files.add(item)
+    return sorted(files)
+
+
+def range_output_path(file_path, start, end):
+    """file_path with the time range added to its name, e.g. piece_30s-45s.wav or piece_30s-end.wav."""
+    root, extension = os.path.splitext(file_path)
+    return f"{root}_{start:g}s-{'end' if end is None else format(end, 'g') + 's'}{extension}"
+
+
+def transcribe_one(file_path, output_dir, microphone, verbose, midi=False, start=None, end=None,
+                   segment_workers=None):
+    """Transcribe a single file (or its start..end seconds) in a worker process and write its outputs.
+
+    Writes a .ly and a .json file, and a .mid file if midi is set. Outputs of a
+    time range get the range in their names. With segment_workers, the file is
+    instead split into segments analysed by that many processes.
+    """
+    fft = _worker_fft if _worker_fft is not None else FFT()
+    fft.tracer.reset()
+    started = time.perf_counter()
+    output_path = file_path
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(sys.stdout if verbose else devnull):
+        if segment_workers is not None:
+            stream = WavStream(file_path)
+            fs = stream.fs
+            notes = SegmentedTranscriber(fft, workers=segment_workers).transcribe(file_path, normalize=microphone)
+            audio_seconds = len(stream) / fs
+        elif start is None and end is None:
+            fs, data = fft.load_audio(file_path, normalize=microphone)
+            notes = fft.analyse(fs, data)
+            audio_seconds = len(data) / fs
+        else:
+            start = start or 0.0
+            stream = WavStream(file_path, normalize=microphone)
+            fs = stream.fs
+            start_frame, end_frame = fft.frame_range(fs, len(stream), start, end)
+            notes = fft.analyse_range(fs, stream.data, start_frame, end_frame, stream.scale_by)
+            audio_seconds = max(0.0, min(end_frame * fft.fft_window_seconds, len(stream) / fs)
+                                - start_frame * fft.fft_window_seconds)
+            output_path = range_output_path(file_path, start, end)
+        lilypond_file_name = fft.export_notes(notes, output_path, output_dir=output_dir, render=False)
+        midi_file_name = fft.export_midi(notes, output_path, output_dir=output_dir) if midi else None
+
+    json_file_name = os.path.splitext(lilypond_file_name)[0] + ".json"
+    with open(json_file_name, "w") as file:
+        json.dump({"file": file_path,
+                   "sample_rate": fs,
+                   "start": start,
+                   "end": end,
+                   "audio_seconds": audio_seconds,
+                   "notes": fft.notes_to_info(notes)}, file, indent=2)
+
+    return {"file": file_path,
+            "lilypond": lilypond_file_name,
+            "json": json_file_name,
+            "midi": midi_file_name,
+            "audio_seconds": audio_seconds,
+            "elapsed": time.perf_counter() - started,
+            "trace": fft.tracer.to_dict()}
+
+
+def run_now(function, *args):
+    """Call function in this process and return its outcome as a finished Future."""
+    future = Future()
+    try:
+        future.set_result(function(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Transcribe WAV files to LilyPond and JSON note lists.")
+    parser.add_argument("inputs", nargs="+", help="WAV files, directories or glob patterns")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("-o", "--output-dir", default=None, help="write outputs here instead of next to each input")
+    parser.add_argument("--microphone", action="store_true", help="normalise the input like microphone recordings")
+    parser.add_argument("--polyphonic", action="store_true", help="detect chords instead of one note at a time")
+    parser.add_argument("--refine-onsets", action="store_true",
+                        help="re-analyse note changes with short windows for more accurate onsets")
+    parser.add_argument("--decimate", action="store_true",
+                        help="analyse at a reduced sample rate matched to the highest note (faster)")
+    parser.add_argument("--float32", action="store_true",
+                        help="keep the filtered signal and spectra in single precision (half the memory)")
+    parser.add_argument("--fft-window-seconds", type=float, default=0.20, metavar="SECONDS",
+                        help="analysis window length (default: 0.2); shorter windows need --interpolate-peaks")
+    parser.add_argument("--interpolate-peaks", action="store_true",
+                        help="locate spectral peaks between FFT bins, so that short windows keep their pitch accuracy")
+    parser.add_argument("--cache", metavar="DIR",
+                        help="keep spectrograms here so later whole-file runs with other thresholds skip the DSP")
+    parser.add_argument("--segments", action="store_true",
+                        help="split each file into segments analysed by the workers in parallel, one file at a time "
+                             "(for a few long recordings)")
+    parser.add_argument("--start", type=float, metavar="SECONDS",
+                        help="transcribe only from this time on; the rest of the file is not read")
+    parser.add_argument("--end", type=float, metavar="SECONDS", help="transcribe only up to this time")
+    parser.add_argument("--midi", action="store_true", help="also write a .mid file with the exact note timings")
+    parser.add_argument("--render", action="store_true", help="also render each .ly file to PDF with LilyPond")
+    parser.add_argument("--render-workers", type=int, default=2, help="number of parallel LilyPond invocations")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show the converter output of each file")
+    parser.add_argument("--trace", metavar="FILE", help="write per-file stage timings and counters as JSON")
+    parser.add_argument("--debug-frames", action="store_true", help="include per-frame debug records in --trace")
+    args = parser.parse_args(argv)
+
+    files = expand_inputs(args.inputs)
+    if not files:
+        parser.error("no WAV files matched")
+    if args.polyphonic and args.refine_onsets:
+        parser.error("--refine-onsets cannot be combined with --polyphonic")
+    if args.segments and (args.refine_onsets or args.start is not None or args.end is not None):
+        parser.error("--segments cannot be combined with --refine-onsets, --start or --end")
+    if args.cache and (args.segments or args.start is not None or args.end is not None):
+        parser.error("--cache only applies to whole-file runs; it cannot be combined with --segments, --start or --end")
+    if args.output_dir is not None:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    started = time.perf_counter()
+    total_audio_seconds = 0.0
+    failures = 0
+    traces = {}
+    renders = {}
+    render_queue = LilyPondRenderQueue(max_workers=args.render_workers) if args.render else None
+    initargs = (args.debug_frames, args.polyphonic, args.refine_onsets, args.decimate, args.cache, args.float32,
+                args.fft_window_seconds, args.interpolate_peaks)
+    with contextlib.ExitStack() as stack:
+        if args.segments:
+            # The workers split each file between them, so the files themselves go one by one
+            _init_worker(*initargs)
+            outcomes = ((file_path, run_now(transcribe_one, file_path, args.output_dir, args.microphone,
+                                            args.verbose, args.midi, None, None, args.workers))
+                        for file_path in files)
+        else:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                                               initargs=initargs))
+            futures = {executor.submit(transcribe_one, file_path, args.output_dir, args.microphone, args.verbose,
+                                       args.midi, args.start, args.end): file_path for file_path in files}
+            outcomes = ((futures[future], future) for future in as_completed(futures))
+
+        for file_path, future in outcomes:
+            try:
+                result = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"FAILED {file_path}: {e}", file=sys.stderr)
+                continue
+            total_audio_seconds += result["audio_seconds"]
+            traces[result["file"]] = result["trace"]
+            outputs = ", ".join(name for name in (result["lilypond"], result["json"], result["midi"]) if name)
+            print(f"{result['file']}: {result['audio_seconds']:.1f}s of audio in {result['elapsed']:.2f}s "
+                  f"-> {outputs}")
+            if render_queue is not None:
+                renders[result["lilypond"]] = render_queue.submit(result["lilypond"])
+
+    if render_queue is not None:
+        for lilypond_file_name, future in renders.items():
+            try:
+                print(f"{lilypond_file_name} -> {future.result()}")
+            except Exception as e:
+                print(f"  rendering {lilypond_file_name} failed: {e}", file=sys.stderr)
+        render_queue.shutdown()
+
+    elapsed = time.perf_counter() - started
+    print(f"Transcribed {len(files) - failures}/{len(files)} files, {total_audio_seconds:.1f}s of audio "
+          f"in {elapsed:.2f}s ({total_audio_seconds / elapsed:.1f}x real time, "
+          f"{(len(files) - failures) / elapsed:.2f} files/s) with {args.workers} workers")
+
+    if args.trace:
+        with open(args.trace, "w") as file:
+            json.dump({"elapsed": elapsed, "audio_seconds": total_audio_seconds, "files": traces},
+                      file, indent=2, default=float)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())